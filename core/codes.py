@@ -0,0 +1,185 @@
+# codes.py - Codes linéaires sur Z_q et décodage par syndrome précalculé (CODED-BKW)
+import numpy as np
+from functools import lru_cache
+
+# Paires (erreur essayée, syndrome) évaluées pour construire une table de décodage ;
+# au-delà, les erreurs du premier segment sont limitées à une boule centrée
+DECODING_CELLS = 1 << 24
+
+# Nombre maximal de syndromes (lignes de la table des chefs de classe)
+MAX_SYNDROMES = 1 << 16
+
+
+def centered(values, q):
+    """Représentants de Z_q dans ]-q/2, q/2]"""
+    values = np.asarray(values, dtype=np.int64) % q
+    return np.where(values > q // 2, values - q, values)
+
+
+@lru_cache(maxsize=32)
+def _coset_leaders(parity_bytes, k, r, q):
+    """Table syndrome → erreur de plus petite norme (q^r lignes de longueur k + r)
+
+    Pour G = [I_k | P], une erreur (x, y) a pour syndrome y - xP : pour chaque x
+    essayé, y = s + xP, et on garde le x qui minimise |x|² + |y|² (centrés).
+    """
+    P = np.frombuffer(parity_bytes, dtype=np.int64).reshape(k, r)
+    # Ligne s de la table : syndrome de code s (chiffre i en base q = composante i)
+    syndromes = (np.arange(q ** r)[:, None] // q ** np.arange(r, dtype=np.int64)) % q
+
+    # Premier segment : boule centrée, Z_q entier si la table le permet
+    values = centered(np.arange(q), q)
+    radius = q
+    while radius > 0 and int(np.sum(np.abs(values) <= radius)) ** k * q ** r > DECODING_CELLS:
+        radius -= 1
+    # Par |x| croissant : à coût égal, la première erreur essayée (la plus courte) reste
+    values = np.sort(values[np.abs(values) <= radius])
+    values = values[np.argsort(np.abs(values), kind='stable')]
+    heads = values[np.indices((len(values),) * k).reshape(k, len(values) ** k).T]
+
+    best_cost = np.full(q ** r, np.iinfo(np.int64).max)
+    leaders = np.zeros((q ** r, k + r), dtype=np.int64)
+    leaders[:, k:] = centered(syndromes, q)
+    step = max(1, DECODING_CELLS // max(1, q ** r * max(r, 1)))
+    for lo in range(0, len(heads), step):
+        x = heads[lo:lo + step]
+        y = centered(syndromes[None, :, :] + (x @ P)[:, None, :], q)
+        cost = (x * x).sum(axis=1)[:, None] + (y * y).sum(axis=2)
+        choice = cost.argmin(axis=0)
+        cost = cost[choice, np.arange(q ** r)]
+        better = np.flatnonzero(cost < best_cost)
+        best_cost[better] = cost[better]
+        leaders[better, :k] = x[choice[better]]
+        leaders[better, k:] = y[choice[better], better]
+
+    leaders.flags.writeable = False
+    return leaders
+
+
+class LinearCode:
+    """Code linéaire [n, k] sur Z_q sous forme systématique G = [I_k | P]
+
+    Le décodage (mot de code le plus proche en norme euclidienne centrée)
+    passe par une table des chefs de classe indexée par le syndrome,
+    précalculée une fois par (code, q) et partagée par toutes les instances ;
+    elle est limitée à MAX_SYNDROMES lignes. Les codes identité et de
+    répétition se décodent en forme close, sans table.
+    """
+
+    def __init__(self, parity, q, name='linéaire', decoder='table'):
+        """
+        parity: matrice P (k × (n - k)) de la forme systématique
+        q: modulus
+        decoder: 'table' (syndromes), ou 'identity' / 'repetition' (formes closes,
+        sans table)
+        """
+        self.q = q
+        self.P = np.ascontiguousarray(np.asarray(parity, dtype=np.int64) % q)
+        self.k, self.r = self.P.shape
+        self.n = self.k + self.r
+        self.name = name
+        self.G = np.hstack([np.eye(self.k, dtype=np.int64), self.P])
+        self.H = np.hstack([(-self.P.T) % q, np.eye(self.r, dtype=np.int64)])
+        self.decoder = decoder
+
+        if decoder == 'table' and q ** self.r > MAX_SYNDROMES:
+            raise ValueError(f"Table de décodage trop grande pour {self}: q^{self.r} = "
+                             f"{q ** self.r} syndromes (max {MAX_SYNDROMES}) ; "
+                             f"choisir un code de plus grande dimension k")
+
+    def __repr__(self):
+        return f"LinearCode({self.name} [{self.n}, {self.k}] sur Z_{self.q})"
+
+    @classmethod
+    def identity(cls, n, q):
+        """Code trivial [n, n] : chaque bloc est son propre mot de code (BKW simple)"""
+        return cls(np.zeros((n, 0), dtype=np.int64), q, 'identité', 'identity')
+
+    @classmethod
+    def repetition(cls, n, q):
+        """Code de répétition [n, 1] : mots (m, m, ..., m)"""
+        return cls(np.ones((1, n - 1), dtype=np.int64), q, 'répétition', 'repetition')
+
+    @classmethod
+    def parity(cls, n, q):
+        """Code de parité [n, n - 1] : dernière composante = somme des autres"""
+        return cls(np.ones((n - 1, 1), dtype=np.int64), q, 'parité')
+
+    @classmethod
+    def random(cls, n, k, q, seed=0):
+        """Code systématique [n, k] de partie P aléatoire (graine fixée)"""
+        rng = np.random.default_rng(seed)
+        return cls(rng.integers(0, q, (k, n - k)), q, 'aléatoire')
+
+    @classmethod
+    def from_generator(cls, generator, q):
+        """Code de matrice génératrice quelconque (q premier), mise sous forme systématique"""
+        G = np.asarray(generator, dtype=np.int64) % q
+        k, n = G.shape
+        for column in range(k):
+            pivots = np.flatnonzero(G[column:, column])
+            if len(pivots) == 0:
+                raise ValueError("Les k premières colonnes de la matrice génératrice "
+                                 "doivent être de rang k")
+            pivot = column + pivots[0]
+            G[[column, pivot]] = G[[pivot, column]]
+            G[column] = G[column] * pow(int(G[column, column]), -1, q) % q
+            others = np.arange(k) != column
+            G[others] = (G[others] - np.outer(G[others, column], G[column])) % q
+        return cls(G[:, k:], q, 'générique')
+
+    @classmethod
+    def from_params(cls, spec, n, q, dimension=None, seed=0):
+        """Code désigné par un nom ('identity', 'repetition', 'parity', 'random')
+        ou par une matrice génératrice"""
+        if not isinstance(spec, str):
+            return cls.from_generator(spec, q)
+        if spec == 'identity':
+            return cls.identity(n, q)
+        if spec == 'repetition':
+            return cls.repetition(n, q)
+        if spec == 'parity':
+            return cls.parity(n, q)
+        if spec == 'random':
+            return cls.random(n, dimension or max(1, n - 1), q, seed)
+        raise ValueError(f"Code inconnu: {spec}")
+
+    @property
+    def leaders(self):
+        """Table syndrome → chef de classe (précalculée une fois par (code, q))"""
+        return _coset_leaders(self.P.tobytes(), self.k, self.r, self.q)
+
+    def syndromes(self, block):
+        """Code entier du syndrome H·v de chaque ligne (chiffre i = composante i)"""
+        block = np.asarray(block, dtype=np.int64)
+        weights = self.q ** np.arange(self.r, dtype=np.int64)
+        return ((block @ self.H.T) % self.q) @ weights
+
+    def decode(self, block):
+        """Mots de code les plus proches et leurs messages, par lots (indexation de table)
+
+        Retourne (mots de code, messages) : messages = k premières composantes.
+        """
+        block = np.asarray(block, dtype=np.int64) % self.q
+        if self.decoder == 'identity':
+            return block, block
+        if self.decoder == 'repetition':
+            message = self.nearest_repetition(block)
+            return np.repeat(message[:, None], self.n, axis=1), message[:, None]
+        codewords = (block - self.leaders[self.syndromes(block)]) % self.q
+        return codewords, codewords[:, :self.k]
+
+    def nearest_repetition(self, block):
+        """Pour chaque ligne, le m de Z_q qui minimise Σ (v_i - m)² (centrés), sans table"""
+        best = np.zeros(len(block), dtype=np.int64)
+        best_cost = np.full(len(block), np.iinfo(np.int64).max)
+        for m in range(self.q):
+            cost = (centered(block - m, self.q) ** 2).sum(axis=1)
+            better = cost < best_cost
+            best[better] = m
+            best_cost[better] = cost[better]
+        return best
+
+    def messages(self, block):
+        """Messages des mots de code les plus proches (clés de collision)"""
+        return self.decode(block)[1]
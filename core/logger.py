@@ -0,0 +1,79 @@
+# logger.py - Journal des armes : niveaux, formatage différé, limitation de débit
+import time
+from contextlib import contextmanager
+
+# quiet : erreurs seulement ; summary : messages principaux et bilans de phase ;
+# verbose : détails des boucles (limités) ; debug : tous les détails
+LEVELS = {'quiet': 0, 'summary': 1, 'verbose': 2, 'debug': 3}
+
+# Nombre de messages détaillés affichés par modèle de message et par phase
+DEFAULT_RATE_LIMIT = 20
+
+
+class WeaponLogger:
+    """Journal structuré compatible avec l'ancien callback log(message, msg_type)"""
+
+    def __init__(self, callback=None, level='verbose', rate_limit=DEFAULT_RATE_LIMIT):
+        """
+        callback: fonction (message, msg_type) qui affiche réellement le message
+        level: 'quiet', 'summary', 'verbose' ou 'debug'
+        rate_limit: messages détaillés par modèle et par phase (None = illimité)
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Niveau de journal inconnu: {level}")
+
+        self.callback = callback or print
+        self.level = LEVELS[level]
+        self.rate_limit = rate_limit
+        self.counts = {}
+        self.suppressed = 0
+
+    @classmethod
+    def wrap(cls, callback=None, level='verbose'):
+        """Réutilise un WeaponLogger existant ou enveloppe un simple callback"""
+        if isinstance(callback, cls):
+            return callback
+        return cls(callback, level)
+
+    def __call__(self, message, msg_type='info'):
+        """Message principal (niveau summary) ; les erreurs passent toujours"""
+        if self.level >= LEVELS['summary'] or msg_type == 'error':
+            self.callback(message, msg_type)
+
+    @property
+    def verbose(self):
+        """Vrai si les détails sont affichés : permet d'éviter de préparer leurs arguments"""
+        return self.level >= LEVELS['verbose']
+
+    def detail(self, template, *args, msg_type='info', key=None):
+        """Message de boucle : formaté seulement s'il est affiché, limité par modèle"""
+        if self.level < LEVELS['verbose']:
+            return
+
+        key = template if key is None else key
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+
+        if (self.level < LEVELS['debug'] and self.rate_limit is not None
+                and count >= self.rate_limit):
+            self.suppressed += 1
+            return
+
+        self.callback(template.format(*args), msg_type)
+
+    @contextmanager
+    def phase(self, name):
+        """Délimite une phase : bilan (durée, messages masqués) à la sortie"""
+        counts, suppressed = self.counts, self.suppressed
+        self.counts, self.suppressed = {}, 0
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.level >= LEVELS['summary']:
+                summary = f"⏱️ {name}: {elapsed:.3f} s"
+                if self.suppressed:
+                    summary += f" ({self.suppressed} messages détaillés masqués)"
+                self.callback(summary, 'info')
+            self.counts, self.suppressed = counts, suppressed
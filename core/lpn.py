@@ -1,45 +1,92 @@
 # lpn.py - Version modifiée
 import numpy as np
+from core.utils import arrays_to_samples
+from core.oracle import SampleOracle
+from core.storage import write_samples
+from core.rng import SampleStream, fresh_seed
+
+
+def _draw_lpn_block(args, sequence, size):
+    """Tire un bloc d'échantillons LPN depuis son propre flux (exécutable dans un processus)"""
+    k, tau, secret = args
+    rng = np.random.default_rng(sequence)
+    
+    # Vecteurs aléatoires
+    V = rng.integers(0, 2, (size, k), dtype=np.uint8)
+    
+    # Produit scalaire modulo 2 (le débordement uint8 préserve la parité)
+    inner_products = (V @ np.asarray(secret, dtype=np.uint8)) & 1
+    
+    # Bruit de Bernoulli
+    noise = (rng.random(size) < tau).astype(np.uint8)
+    
+    # Valeurs bruitées
+    c = inner_products ^ noise
+    
+    return V, c
+
 
 class LPNInstance:
     """Génère une instance du problème Learning Parity with Noise"""
     
-    def __init__(self, k, tau, secret=None):
+    def __init__(self, k, tau, secret=None, seed=None, workers=1):
         """
         k: dimension du secret
         tau: paramètre de bruit (probabilité qu'un bit soit inversé)
         secret: secret spécifique (optionnel)
+        seed: graine de l'instance, pour rejouer une exécution à l'identique (optionnel)
+        workers: nombre de processus pour la génération des échantillons
         """
         self.k = k
         self.tau = tau
+        self.seed = fresh_seed() if seed is None else seed
+        self.workers = workers
+        self.stream = SampleStream(self.seed)
         
         if secret is not None:
             if len(secret) != k:
                 raise ValueError(f"Le secret doit avoir {k} bits, mais a {len(secret)}")
             self.secret = secret.copy()
         else:
-            self.secret = np.random.randint(0, 2, k).tolist()
+            self.secret = self.stream.secret_rng().integers(0, 2, k).tolist()
     
-    def generate_samples(self, n):
-        """Génère n échantillons (v, c) où c = <v, s> ⊕ noise"""
-        samples = []
+    def generate_samples(self, n, as_arrays=False):
+        """Génère n échantillons (v, c) où c = <v, s> ⊕ noise
         
-        for _ in range(n):
-            # Vecteur aléatoire
-            v = np.random.randint(0, 2, self.k)
-            
-            # Produit scalaire modulo 2
-            inner_product = np.dot(v, self.secret) % 2
-            
-            # Bruit de Bernoulli
-            noise = 1 if np.random.random() < self.tau else 0
-            
-            # Valeur bruitée
-            c = inner_product ^ noise
-            
-            samples.append({'v': v.tolist(), 'c': c})
+        as_arrays: si True, retourne la matrice V (n, k) et le vecteur c
+                   au lieu de la liste de dictionnaires {'v', 'c'}
+        """
+        V, c = self._draw(n)
+        
+        if as_arrays:
+            return V, c
+        
+        # Compatibilité avec les armes qui attendent des dictionnaires
+        return arrays_to_samples(V, c)
+    
+    def generate_batches(self, n, chunk_size=100000):
+        """Génère n échantillons par paquets (V, c) d'au plus chunk_size lignes"""
+        if chunk_size <= 0:
+            raise ValueError("chunk_size doit être strictement positif")
         
-        return samples
+        remaining = n
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            yield self._draw(size)
+            remaining -= size
+    
+    def oracle(self, chunk_size=10000, max_samples=None):
+        """Oracle paresseux qui tire des paquets (V, c) à la demande"""
+        return SampleOracle(self, chunk_size, max_samples)
+    
+    def save_samples(self, path, count, chunk_size=100000):
+        """Écrit count échantillons dans un fichier binaire ouvrable par memmap"""
+        return write_samples(path, self, count, chunk_size)
+    
+    def _draw(self, n):
+        """Tire n échantillons par blocs NumPy indépendants (en parallèle si workers > 1)"""
+        return self.stream.draw(_draw_lpn_block, (self.k, self.tau, tuple(self.secret)),
+                                n, self.workers)
     
     def verify_sample(self, sample):
         """Vérifie si un échantillon est cohérent (pour debug)"""
@@ -1,19 +1,85 @@
 # lwe.py - Version modifiée
 import numpy as np
+from functools import lru_cache
+from core.utils import arrays_to_samples
+from core.oracle import SampleOracle
+from core.storage import write_samples
+from core.rng import SampleStream, fresh_seed
+
+# Nombre d'écarts-types conservés dans la table du sampler gaussien
+DEFAULT_TAIL_CUT = 12
+
+
+@lru_cache(maxsize=32)
+def gaussian_cdt(sigma, tail_cut=DEFAULT_TAIL_CUT):
+    """Table de distribution cumulée (CDT) de la gaussienne discrète centrée
+    
+    Retourne le support [-B, B] (B = ⌈tail_cut·σ⌉) et les probabilités cumulées.
+    """
+    bound = max(1, int(np.ceil(tail_cut * sigma)))
+    support = np.arange(-bound, bound + 1, dtype=np.int64)
+    
+    weights = np.exp(-(support.astype(np.float64) ** 2) / (2 * sigma ** 2))
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    
+    # Les tables sont partagées par le cache : lecture seule
+    support.flags.writeable = False
+    cdf.flags.writeable = False
+    return support, cdf
+
+
+def sample_discrete_gaussian(size, sigma, tail_cut=DEFAULT_TAIL_CUT, rng=None):
+    """Tire size erreurs gaussiennes discrètes par recherche dans la CDT
+    
+    rng: générateur numpy (par défaut l'état global np.random)
+    """
+    if sigma <= 0:
+        return np.zeros(size, dtype=np.int64)
+    
+    support, cdf = gaussian_cdt(float(sigma), tail_cut)
+    u = (np.random if rng is None else rng).random(size)
+    return support[np.searchsorted(cdf, u, side='right')]
+
+
+def _draw_lwe_block(args, sequence, size):
+    """Tire un bloc d'échantillons LWE depuis son propre flux (exécutable dans un processus)"""
+    n, q, sigma, secret = args
+    rng = np.random.default_rng(sequence)
+    
+    # Vecteurs aléatoires
+    A = rng.integers(0, q, (size, n), dtype=np.int64)
+    
+    # Produits scalaires : un seul produit matrice-vecteur
+    inner_products = (A @ np.asarray(secret, dtype=np.int64)) % q
+    
+    # Bruit gaussien discret (table CDT)
+    noise = sample_discrete_gaussian(size, sigma, rng=rng)
+    
+    # Valeurs bruitées
+    b = (inner_products + noise) % q
+    
+    return A, b
+
 
 class LWEInstance:
     """Génère une instance du problème Learning With Errors"""
     
-    def __init__(self, n, q, sigma, secret=None):
+    def __init__(self, n, q, sigma, secret=None, seed=None, workers=1):
         """
         n: dimension du secret
         q: modulus
         sigma: écart-type du bruit gaussien
         secret: secret spécifique (optionnel)
+        seed: graine de l'instance, pour rejouer une exécution à l'identique (optionnel)
+        workers: nombre de processus pour la génération des échantillons
         """
         self.n = n
         self.q = q
         self.sigma = sigma
+        self.seed = fresh_seed() if seed is None else seed
+        self.workers = workers
+        self.stream = SampleStream(self.seed)
         
         if secret is not None:
             if len(secret) != n:
@@ -22,25 +88,41 @@ class LWEInstance:
                 raise ValueError(f"Toutes les valeurs du secret doivent être entre 0 et {q-1}")
             self.secret = secret.copy()
         else:
-            self.secret = np.random.randint(0, q, n).tolist()
+            self.secret = self.stream.secret_rng().integers(0, q, n).tolist()
     
-    def generate_samples(self, m):
-        """Génère m échantillons (a, b) où b = <a, s> + e mod q"""
-        samples = []
+    def generate_samples(self, m, as_arrays=False):
+        """Génère m échantillons (a, b) où b = <a, s> + e mod q
+        
+        as_arrays: si True, retourne la matrice A (m, n) et le vecteur b
+                   au lieu de la liste de dictionnaires {'v', 'c'}
+        """
+        A, b = self._draw(m)
+        
+        if as_arrays:
+            return A, b
         
-        for _ in range(m):
-            # Vecteur aléatoire
-            a = np.random.randint(0, self.q, self.n)
-            
-            # Produit scalaire
-            inner_product = np.dot(a, self.secret) % self.q
-            
-            # Bruit gaussien discret
-            noise = int(np.round(np.random.normal(0, self.sigma)))
-            
-            # Valeur bruitée
-            b = (inner_product + noise) % self.q
-            
-            samples.append({'v': a.tolist(), 'c': b})
+        return arrays_to_samples(A, b)
+    
+    def generate_batches(self, m, chunk_size=100000):
+        """Génère m échantillons par paquets (A, b) d'au plus chunk_size lignes"""
+        if chunk_size <= 0:
+            raise ValueError("chunk_size doit être strictement positif")
         
-        return samples
\ No newline at end of file
+        remaining = m
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            yield self._draw(size)
+            remaining -= size
+    
+    def oracle(self, chunk_size=10000, max_samples=None):
+        """Oracle paresseux qui tire des paquets (V, c) à la demande"""
+        return SampleOracle(self, chunk_size, max_samples)
+    
+    def save_samples(self, path, count, chunk_size=100000):
+        """Écrit count échantillons dans un fichier binaire ouvrable par memmap"""
+        return write_samples(path, self, count, chunk_size)
+    
+    def _draw(self, m):
+        """Tire m échantillons par blocs NumPy indépendants (en parallèle si workers > 1)"""
+        return self.stream.draw(_draw_lwe_block, (self.n, self.q, self.sigma, tuple(self.secret)),
+                                m, self.workers)
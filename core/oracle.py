@@ -0,0 +1,115 @@
+# oracle.py - Oracle d'échantillons à la demande
+import numpy as np
+from core.utils import encode_blocks
+
+
+class SampleOracle:
+    """Oracle paresseux : tire des paquets d'échantillons (V, c) à la demande"""
+
+    def __init__(self, instance, chunk_size=10000, max_samples=None):
+        """
+        instance: LPNInstance ou LWEInstance
+        chunk_size: nombre d'échantillons par paquet
+        max_samples: budget total de requêtes (None = illimité)
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size doit être strictement positif")
+
+        self.instance = instance
+        self.chunk_size = chunk_size
+        self.max_samples = max_samples
+        self.drawn = 0
+
+        # Modulus des vecteurs : 2 pour LPN, q pour LWE
+        self.modulus = getattr(instance, 'q', 2)
+        self.dimension = getattr(instance, 'n', None) or getattr(instance, 'k')
+
+    @property
+    def remaining(self):
+        """Nombre d'échantillons encore disponibles (None = illimité)"""
+        if self.max_samples is None:
+            return None
+        return self.max_samples - self.drawn
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = self.draw(self.chunk_size)
+        if len(chunk[1]) == 0:
+            raise StopIteration
+        return chunk
+
+    def draw(self, n):
+        """Tire au plus n échantillons (moins si le budget est épuisé)"""
+        if self.remaining is not None:
+            n = min(n, self.remaining)
+        n = max(n, 0)
+
+        V, c = self.instance.generate_samples(n, as_arrays=True)
+        self.drawn += n
+        return V, c
+
+    def take(self, n):
+        """Tire n échantillons par paquets et les concatène"""
+        chunks = []
+        while n > 0:
+            V, c = self.draw(min(self.chunk_size, n))
+            if len(c) == 0:
+                break
+            chunks.append((V, c))
+            n -= len(c)
+        return self._concatenate(chunks)
+
+    def draw_until(self, condition, max_samples=None):
+        """Tire des paquets jusqu'à ce que condition(V_chunk, c_chunk) renvoie True
+
+        condition est appelée sur chaque nouveau paquet et peut tenir son propre état.
+        max_samples borne le nombre d'échantillons tirés par cet appel.
+        """
+        chunks = []
+        total = 0
+        while max_samples is None or total < max_samples:
+            size = self.chunk_size
+            if max_samples is not None:
+                size = min(size, max_samples - total)
+
+            V, c = self.draw(size)
+            if len(c) == 0:
+                break
+
+            chunks.append((V, c))
+            total += len(c)
+            if condition(V, c):
+                break
+
+        return self._concatenate(chunks)
+
+    def until_occupancy(self, start, end, target, min_count=2, max_samples=None):
+        """Tire jusqu'à ce qu'une fraction target des seaux du bloc [start, end) soit remplie
+
+        Un seau est rempli lorsqu'il contient au moins min_count échantillons,
+        c'est-à-dire qu'il produit au moins une réduction.
+        """
+        n_buckets = self.modulus ** (end - start)
+        counts = np.zeros(n_buckets, dtype=np.int64)
+
+        def occupancy_reached(V, c):
+            counts[:] += np.bincount(encode_blocks(V, start, end, self.modulus),
+                                     minlength=n_buckets)
+            return np.count_nonzero(counts >= min_count) >= target * n_buckets
+
+        return self.draw_until(occupancy_reached, max_samples)
+
+    def occupancy(self, V, start, end, min_count=2):
+        """Fraction des seaux du bloc [start, end) contenant au moins min_count lignes de V"""
+        n_buckets = self.modulus ** (end - start)
+        counts = np.bincount(encode_blocks(V, start, end, self.modulus), minlength=n_buckets)
+        return np.count_nonzero(counts >= min_count) / n_buckets
+
+    def _concatenate(self, chunks):
+        if not chunks:
+            return (np.zeros((0, self.dimension), dtype=np.int64),
+                    np.zeros(0, dtype=np.int64))
+        return (np.concatenate([V for V, _ in chunks]),
+                np.concatenate([c for _, c in chunks]))
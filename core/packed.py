@@ -0,0 +1,155 @@
+# packed.py - Stockage compact des échantillons LPN
+import numpy as np
+
+WORD_BITS = 64
+
+# Table de poids de Hamming sur un octet (repli si np.bitwise_count est absent)
+_BYTE_WEIGHTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """Poids de Hamming de chaque mot uint64"""
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).astype(np.int64)
+    as_bytes = words.view(np.uint8).reshape(words.shape + (8,))
+    return _BYTE_WEIGHTS[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def pack_bits(V, k=None):
+    """Compacte une matrice binaire (n, k) en mots uint64 (n, ⌈k/64⌉)
+
+    Le bit j du vecteur est le bit j % 64 du mot j // 64.
+    """
+    V = np.asarray(V, dtype=np.uint8)
+    if V.ndim == 1:
+        return pack_bits(V[None, :], k)[0]
+
+    k = V.shape[1] if k is None else k
+    n_words = max(1, -(-k // WORD_BITS))
+    packed = np.packbits(V, axis=1, bitorder='little')
+
+    padded = np.zeros((V.shape[0], n_words * 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view('<u8').astype(np.uint64)
+
+
+def unpack_bits(words, k):
+    """Opération inverse de pack_bits"""
+    words = np.ascontiguousarray(words, dtype='<u8')
+    if words.ndim == 1:
+        return unpack_bits(words[None, :], k)[0]
+
+    as_bytes = words.view(np.uint8).reshape(words.shape[0], words.shape[1] * 8)
+    return np.unpackbits(as_bytes, axis=1, bitorder='little')[:, :k]
+
+
+def block_mask(start, end, n_words):
+    """Masque (n_words,) dont les bits start à end-1 sont à 1"""
+    bits = np.zeros(n_words * WORD_BITS, dtype=np.uint8)
+    bits[start:end] = 1
+    return pack_bits(bits)
+
+
+class PackedLPNSamples:
+    """Échantillons LPN compactés : 64 bits de v par mot, étiquettes à part
+
+    Seul v est compacté : les étiquettes gardent un octet (uint8) par
+    échantillon, pour être indexées par les mêmes lignes que words
+    (réductions, cache, votes) ; un mot par ligne domine de toute façon
+    (8·⌈k/64⌉ + 1 octets par échantillon).
+    """
+
+    def __init__(self, words, labels, k):
+        """
+        words: matrice (n, ⌈k/64⌉) de mots uint64
+        labels: vecteur (n,) uint8 des bits c, un octet par échantillon (non compacté)
+        k: dimension des vecteurs
+        """
+        self.words = words
+        self.labels = labels
+        self.k = k
+
+    @classmethod
+    def from_arrays(cls, V, c):
+        """Construit depuis une matrice binaire V et un vecteur c"""
+        V = np.asarray(V, dtype=np.uint8)
+        k = V.shape[1]
+        return cls(pack_bits(V, k), np.asarray(c, dtype=np.uint8).copy(), k)
+
+    @classmethod
+    def from_samples(cls, samples, k=None):
+        """Construit depuis une liste {'v', 'c'}, un couple (V, c), un fichier ou un objet compacté"""
+        if isinstance(samples, cls):
+            return samples.copy()
+        if hasattr(samples, 'to_packed'):
+            # Fichier d'échantillons : les mots restent en memmap
+            return samples.to_packed()
+        if isinstance(samples, tuple):
+            return cls.from_arrays(*samples)
+        if not samples:
+            k = k or 0
+            return cls(np.zeros((0, max(1, -(-k // WORD_BITS))), dtype=np.uint64),
+                       np.zeros(0, dtype=np.uint8), k)
+
+        V = np.array([s['v'] for s in samples], dtype=np.uint8)
+        c = np.array([s['c'] for s in samples], dtype=np.uint8)
+        return cls.from_arrays(V, c)
+
+    def to_arrays(self):
+        """Retourne la matrice binaire V et le vecteur c"""
+        return unpack_bits(self.words, self.k), self.labels.copy()
+
+    def to_samples(self):
+        """Retourne la liste de dictionnaires {'v', 'c'}"""
+        V, c = self.to_arrays()
+        return [{'v': v, 'c': ci} for v, ci in zip(V.tolist(), c.tolist())]
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def n_words(self):
+        return self.words.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes + self.labels.nbytes
+
+    def copy(self):
+        return PackedLPNSamples(self.words.copy(), self.labels.copy(), self.k)
+
+    def take(self, indices):
+        """Sous-ensemble des lignes indices"""
+        return PackedLPNSamples(self.words[indices], self.labels[indices], self.k)
+
+    def xor_rows(self, rows, others):
+        """Nouveaux échantillons rows[i] ⊕ others[i] (mots et étiquettes)"""
+        return PackedLPNSamples(self.words[rows] ^ self.words[others],
+                                self.labels[rows] ^ self.labels[others], self.k)
+
+    def block_keys(self, start, end):
+        """Clé entière de chaque bloc v[start:end] (bit i de la clé = v[start+i])"""
+        width = end - start
+        if width > WORD_BITS:
+            raise ValueError(f"Un bloc ne peut dépasser {WORD_BITS} bits, reçu {width}")
+        if width <= 0:
+            return np.zeros(len(self), dtype=np.uint64)
+
+        word, offset = divmod(start, WORD_BITS)
+        keys = self.words[:, word] >> np.uint64(offset)
+        if offset + width > WORD_BITS:
+            keys = keys | (self.words[:, word + 1] << np.uint64(WORD_BITS - offset))
+        if width < WORD_BITS:
+            keys = keys & np.uint64((1 << width) - 1)
+        return keys
+
+    def block_weights(self, start, end):
+        """Poids de Hamming de chaque bloc v[start:end]"""
+        mask = block_mask(start, end, self.n_words)
+        return popcount(self.words & mask).sum(axis=1)
+
+    def inner_products(self, secret_words):
+        """Produits scalaires <v, s> mod 2 pour un secret compacté"""
+        weights = popcount(self.words & secret_words).sum(axis=1)
+        return (weights & 1).astype(np.uint8)
@@ -0,0 +1,227 @@
+# parallel.py - Réduction BKW répartie par classes de clés sur plusieurs processus
+import os
+import numpy as np
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+# En dessous de ce nombre de lignes, le coût des processus dépasse le gain
+MIN_PARALLEL_ROWS = 1 << 15
+
+# Idem pour le test d'hypothèse, en paires (candidat, échantillon) notées
+MIN_PARALLEL_CELLS = 1 << 22
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def available_cores():
+    """Nombre de cœurs utilisables par ce processus"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def mix_keys(keys):
+    """Brassage multiplicatif de clés entières (répartit les clés voisines)"""
+    with np.errstate(over='ignore'):
+        mixed = np.asarray(keys).astype(np.uint64) * _GOLDEN
+    return mixed ^ (mixed >> np.uint64(29))
+
+
+def hash_rows(block):
+    """Empreinte 64 bits de chaque ligne d'un bloc d'entiers"""
+    block = np.asarray(block).astype(np.uint64)
+    weights = (2 * np.arange(block.shape[1], dtype=np.uint64) + np.uint64(1)) * _GOLDEN
+    with np.errstate(over='ignore'):
+        return mix_keys((block * weights).sum(axis=1, dtype=np.uint64))
+
+
+def signed_class_hash(block, modulus):
+    """Empreinte identique pour un bloc et son opposé mod modulus (collisions ±)"""
+    block = np.asarray(block, dtype=np.int64)
+    return hash_rows(block) ^ hash_rows((-block) % modulus)
+
+
+class ShardedReduction:
+    """Répartition d'une étape de réduction entre processus
+
+    Deux lignes de classes différentes ne sont jamais combinées : chaque
+    processus traite une partition des classes (par empreinte de clé), en
+    gardant l'ordre des lignes, puis les résultats sont fusionnés. Le pool
+    est créé au premier appel et réutilisé jusqu'à close().
+    """
+
+    def __init__(self, workers=1, min_rows=MIN_PARALLEL_ROWS):
+        """
+        workers: nombre de processus (1 = calcul dans le processus courant)
+        min_rows: taille minimale d'une étape pour la répartir
+        """
+        self.workers = min(max(1, int(workers or 1)), available_cores(), 1 << 16)
+        self.min_rows = min_rows
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Arrête les processus du pool (recréés au besoin)"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def executor(self):
+        """Pool de processus, créé au premier appel
+
+        Le suivi des ressources est démarré avant le pool : les processus créés
+        par fork le partagent au lieu d'en lancer chacun un, qui signalerait
+        (et supprimerait) à leur sortie les segments partagés qu'ils ont ouverts.
+        """
+        if self.pool is None:
+            if os.name == 'posix':
+                resource_tracker.ensure_running()
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self.pool
+
+    def map(self, function, data, class_hashes, *args):
+        """Applique function(data[shard], *args) à chaque partition
+
+        function doit être une fonction de module (sérialisable) renvoyant un
+        tuple de tableaux. Retourne la liste des couples (indices, résultat) :
+        indices donne la ligne d'origine de chaque ligne de la partition.
+        """
+        n = len(data)
+        if self.workers == 1 or n < self.min_rows:
+            return [(np.arange(n), function(data, *args))]
+
+        # Numéros de partition sur 16 bits : tri stable par base (radix), en O(n)
+        shard_of = ((mix_keys(class_hashes) >> np.uint64(32)) % np.uint64(self.workers)).astype(np.uint16)
+        order = np.argsort(shard_of, kind='stable')
+        bounds = np.searchsorted(shard_of[order], np.arange(self.workers + 1))
+        shards = [order[bounds[i]:bounds[i + 1]] for i in range(self.workers)]
+        shards = [indices for indices in shards if len(indices)]
+
+        parts = [data[indices] for indices in shards]
+        extra = [[arg] * len(parts) for arg in args]
+
+        results = list(self.executor().map(function, parts, *extra))
+
+        return list(zip(shards, results))
+
+
+class SharedArrays:
+    """Tableaux copiés une seule fois en mémoire partagée
+
+    Les processus reçoivent seulement spec (noms des segments, formes, types)
+    et relisent les tableaux avec attach_shared, sans sérialisation.
+    """
+
+    def __init__(self, **arrays):
+        self.segments = []
+        self.spec = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self.segments.append(segment)
+                np.ndarray(array.shape, array.dtype, buffer=segment.buf)[...] = array
+                self.spec[name] = (segment.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Libère les segments (les processus doivent avoir terminé)"""
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+
+def _open_segment(name):
+    """Ouvre un segment existant sans l'inscrire au suivi des ressources (Python ≥ 3.13)
+
+    Avant 3.13, l'inscription va au suivi partagé avec le processus créateur
+    (voir ShardedReduction.executor), qui la retire à la suppression du segment.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+@contextmanager
+def attach_shared(spec):
+    """Vues en lecture sur les tableaux d'un SharedArrays (côté processus)
+
+    Les vues ne doivent pas survivre au bloc with : copier ce qu'on garde.
+    """
+    segments = []
+    arrays = {}
+    try:
+        for name, (segment_name, shape, dtype) in spec.items():
+            segment = _open_segment(segment_name)
+            segments.append(segment)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=segment.buf)
+            arrays[name].flags.writeable = False
+        yield arrays
+    finally:
+        arrays.clear()
+        for segment in segments:
+            segment.close()
+
+
+def merge_groups(shards, n):
+    """Fusion en O(n) des groupements (membres, représentants) de chaque partition
+
+    shards: couples (indices, (membres, représentants)) renvoyés par
+    ShardedReduction.map avec group_pairs. Un groupe ne s'étend jamais sur deux
+    partitions et chacune est déjà dans l'ordre du dictionnaire (par
+    représentant, puis par indice) : la place d'un membre est le début de son
+    groupe (comptage des représentants) plus son rang dans le groupe.
+    Retourne le même résultat que group_pairs sur toutes les lignes.
+    """
+    members = np.concatenate([rows[m] for rows, (m, r) in shards])
+    representatives = np.concatenate([rows[r] for rows, (m, r) in shards])
+
+    counts = np.bincount(representatives, minlength=n)
+    starts = np.cumsum(counts) - counts
+
+    is_first = np.ones(len(members), dtype=bool)
+    is_first[1:] = representatives[1:] != representatives[:-1]
+    positions = np.arange(len(members))
+    group_start = np.maximum.accumulate(np.where(is_first, positions, 0))
+    positions = starts[representatives] + positions - group_start
+
+    merged_members = np.empty_like(members)
+    merged_representatives = np.empty_like(representatives)
+    merged_members[positions] = members
+    merged_representatives[positions] = representatives
+    return merged_members, merged_representatives
+
+
+def merge_by_row(n, rows, *columns):
+    """Tri en O(n) de résultats indexés par des lignes distinctes de [0, n)
+
+    Retourne (lignes, colonnes...) par ligne croissante : le rang de chaque
+    ligne s'obtient par marquage des lignes présentes et somme cumulée.
+    """
+    present = np.zeros(n, dtype=bool)
+    present[rows] = True
+    positions = (np.cumsum(present) - 1)[rows]
+
+    merged = []
+    for column in (rows,) + columns:
+        out = np.empty_like(column)
+        out[positions] = column
+        merged.append(out)
+    return tuple(merged)
@@ -0,0 +1,239 @@
+# planner.py - Planification des échantillons et du découpage (a, b) par modèle de coût BKW
+from math import ceil, exp, isfinite, log, pi, sqrt
+from statistics import NormalDist
+from core.packed import WORD_BITS
+
+# Débit indicatif (opérations élémentaires vectorisées par seconde) pour convertir
+# le coût en durée : un ordre de grandeur, pas une mesure
+OPS_PER_SECOND = 2e8
+
+# Taille maximale (q^b cellules complexes) du tableau du distingueur FFT LWE
+FFT_MAX_CELLS = 1 << 26
+
+# Distingueurs LWE essayés par fallback_plan, dans cet ordre
+LWE_DISTINGUISHERS = ('likelihood', 'fft')
+
+
+def required_samples(bias, candidates, failure):
+    """Échantillons pour distinguer le bon candidat parmi candidates avec un biais donné
+
+    Hoeffding sur l'écart entre le bon candidat et chaque autre, plus une borne
+    de l'union : N = 8·ln(candidates / failure) / bias² (2·ln(1/failure) / bias²
+    pour un vote à deux issues).
+    """
+    if bias * bias == 0:
+        return float('inf')
+    if candidates <= 2:
+        return 2 * log(1 / failure) / bias ** 2
+    return 8 * log(candidates / failure) / bias ** 2
+
+
+def samples_before(after, step):
+    """Plus petit N tel que step(N) ≥ after (step croissant), par dichotomie"""
+    if not isfinite(after):
+        return float('inf')
+    after = ceil(after)
+    if after <= 0:
+        return 0
+    low, high = after, max(2 * after, 1)
+    while step(high) < after:
+        low, high = high, 2 * high
+    while high - low > 1:
+        middle = (low + high) // 2
+        if step(middle) >= after:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def lpn_step(buckets):
+    """Échantillons restants après une étape (représentant par seau : on perd un par seau occupé)"""
+    return lambda n: n - buckets * (1 - exp(-n / buckets))
+
+
+def lwe_step(classes):
+    """Échantillons restants après une étape LWE : une ligne par collision ±
+
+    Une ligne reste seule dans sa classe quand la classe reçoit un nombre impair
+    de lignes (probabilité (1 - e^(-2λ)) / 2 pour λ lignes par classe).
+    """
+    return lambda n: (n - classes * (1 - exp(-2 * n / classes)) / 2) / 2
+
+
+def shared_bias(bias, buckets, steps, failure):
+    """Biais garanti, au risque failure, des bruits des représentants partagés (LPN)
+
+    Chaque étape l combine les lignes d'un seau avec son représentant : les
+    buckets représentants (biais β^(2^l)) sont communs à toutes les lignes, et
+    leur biais moyen s'écarte de β^(2^l) d'un écart-type √((1 - β^(2^(l+1))) / buckets).
+    Retourne le produit des bornes basses à z écarts-types (risque failure / steps
+    par étape), 0 si l'une d'elles est négative : avec peu de seaux, aucun
+    nombre d'échantillons ne compense alors des représentants défavorables.
+    """
+    if steps == 0:
+        return 1.0
+    z = NormalDist().inv_cdf(1 - failure / steps)
+    product = 1.0
+    for level in range(steps):
+        mean = bias ** (2 ** level)
+        low = mean - z * sqrt((1 - mean ** 2) / buckets)
+        if low <= 0:
+            return 0.0
+        product *= low
+    return product
+
+
+def _count(n):
+    """Nombre entier d'échantillons (inf si le plan est irréalisable)"""
+    return int(ceil(n)) if isfinite(n) else float('inf')
+
+
+def _finish(plan, levels, row_cost, solve_cost, row_bytes, cache, ops_per_second):
+    """Complète un plan : mémoire, coût et durée estimés"""
+    stored = sum(levels) if cache else levels[0] + max(levels[1:], default=0)
+    operations = sum(levels[:-1]) * row_cost + solve_cost
+    plan['levels'] = [_count(n) for n in levels]
+    plan['memory'] = _count(stored * row_bytes)
+    plan['operations'] = float(operations)
+    plan['seconds'] = operations / ops_per_second
+    return plan
+
+
+def plan_lpn(k, tau, a, b, success=0.9, solver='majority', cache=True,
+             ops_per_second=OPS_PER_SECOND):
+    """Plan d'une attaque BKW sur LPN(k, τ) découpée en a blocs de b bits
+
+    solver: 'majority' (BKWStandard) ou 'wht' (BKWLF1)
+    Le bloc a, résolu après a - 1 réductions, fixe le nombre d'échantillons.
+    Les représentants partagés par les votes d'un bloc sont comptés par leur
+    biais garanti (shared_bias) plutôt que par leur biais moyen : l'écart compte
+    avec peu de seaux (2^b petit), et le plan est irréalisable (inf) quand
+    leur bruit peut à lui seul inverser les votes.
+    Retourne un dictionnaire (échantillons, biais, mémoire, coût, durée).
+    """
+    steps = a - 1
+    # Risque d'échec partagé à parts égales entre représentants et votes
+    shared = shared_bias(1 - 2 * tau, 2 ** b, steps, (1 - success) / (2 * a))
+    bias = (1 - 2 * tau) * shared
+    failure = (1 - success) / (2 * k if solver == 'majority' else 2 * a)
+
+    if solver == 'wht':
+        final = required_samples(bias, 2 ** b, failure)
+        solve_cost = 2 ** b * b + final
+    else:
+        # Seuls les échantillons de poids 1 sur le bloc votent : 1 sur 2^b par position
+        final = required_samples(bias, 2, failure) * 2 ** b
+        solve_cost = final
+
+    levels = [final]
+    for _ in range(steps):
+        levels.insert(0, samples_before(levels[0], lpn_step(2 ** b)))
+
+    plan = {'type': 'LPN', 'a': a, 'b': b, 'samples': _count(levels[0]),
+            'final_samples': _count(final), 'bias': bias, 'success': success}
+    row_bytes = 8 * max(1, -(-k // WORD_BITS)) + 1
+    return _finish(plan, levels, max(1, -(-k // WORD_BITS)), solve_cost, row_bytes,
+                   cache, ops_per_second)
+
+
+def plan_lwe(n, q, sigma, a, b, success=0.9, distinguisher='fft', cache=True,
+             ops_per_second=OPS_PER_SECOND):
+    """Plan d'une attaque BKW sur LWE(n, q, σ) découpée en a blocs de b composantes
+
+    distinguisher: 'fft' (q^b candidats d'un coup) ou 'likelihood' (motifs de
+    poids 1, seuls notés par le test exhaustif filtré)
+    """
+    steps = a - 1
+    sigma_total = sigma * sqrt(2 ** steps)
+    # Biais de cos(2πe/q) pour une erreur gaussienne de largeur σ_total
+    bias = exp(-2 * pi ** 2 * sigma_total ** 2 / q ** 2)
+    failure = (1 - success) / a
+
+    if distinguisher == 'likelihood':
+        # Une position par motif de poids 1, présent avec probabilité (1 - 1/q)/q^(b-1)
+        share = (1 - 1 / q) / q ** (b - 1)
+        final = required_samples(bias, q, failure / b) / share
+        solve_cost = final * q * b
+    else:
+        final = required_samples(bias, q ** b, failure)
+        solve_cost = q ** b * b * max(1, log(q, 2)) + final
+
+    classes = (q ** b + 1) / 2
+    levels = [final]
+    for _ in range(steps):
+        levels.insert(0, samples_before(levels[0], lwe_step(classes)))
+
+    plan = {'type': 'LWE', 'a': a, 'b': b, 'samples': _count(levels[0]),
+            'final_samples': _count(final), 'bias': bias, 'success': success}
+    return _finish(plan, levels, n, solve_cost, 8 * (n + 1), cache, ops_per_second)
+
+
+def plan_params(params, success=0.9, **options):
+    """Plan pour un dictionnaire de paramètres de mission ('type', 'a', 'b', ...)"""
+    if params['type'] == 'LPN':
+        return plan_lpn(params['k'], params['tau'], params['a'], params['b'], success, **options)
+    return plan_lwe(params['n'], params['q'], params['sigma'], params['a'], params['b'],
+                    success, **options)
+
+
+def suggest_split(params, memory_budget=None, success=0.9, max_samples=None, **options):
+    """Découpage (a, b) le plus rapide dont la mémoire tient dans memory_budget (octets)
+
+    Seuls les découpages exacts a·b = dimension sont considérés.
+    max_samples: nombre maximal d'échantillons du plan (None = sans limite)
+    Retourne le plan retenu (avec a et b) ou None si aucun ne convient.
+    """
+    dimension = params['k'] if params['type'] == 'LPN' else params['n']
+    best = None
+
+    for b in range(1, dimension + 1):
+        if dimension % b:
+            continue
+        if params['type'] == 'LPN' and b > WORD_BITS:
+            continue
+        if (params['type'] == 'LWE' and options.get('distinguisher', 'fft') == 'fft'
+                and params['q'] ** b > FFT_MAX_CELLS):
+            continue
+
+        plan = plan_params(dict(params, a=dimension // b, b=b), success, **options)
+        if not isfinite(plan['seconds']):
+            continue
+        if memory_budget is not None and plan['memory'] > memory_budget:
+            continue
+        if max_samples is not None and plan['samples'] > max_samples:
+            continue
+        if best is None or plan['seconds'] < best['seconds']:
+            best = plan
+
+    return best
+
+
+def fallback_plan(params, max_samples, memory_budget=None, success=0.9, **options):
+    """Plan réalisable avec au plus max_samples échantillons, quand celui de params ne l'est pas
+
+    Essaie d'abord le même découpage avec un autre distingueur (LWE), puis le
+    découpage le plus rapide qui tient, avec le distingueur demandé puis les
+    autres. Le solveur LPN dépend de l'algorithme et n'est pas changé.
+    Retourne (plan, options) ou None si rien ne tient.
+    """
+    choices = [options]
+    if params['type'] == 'LWE':
+        requested = options.get('distinguisher', 'fft')
+        choices += [dict(options, distinguisher=name) for name in LWE_DISTINGUISHERS
+                    if name != requested]
+
+    for choice in choices[1:]:
+        if (choice['distinguisher'] == 'fft'
+                and params['q'] ** params['b'] > FFT_MAX_CELLS):
+            continue
+        plan = plan_params(params, success, **choice)
+        if plan['samples'] <= max_samples and (memory_budget is None
+                                               or plan['memory'] <= memory_budget):
+            return plan, choice
+
+    for choice in choices:
+        plan = suggest_split(params, memory_budget, success, max_samples, **choice)
+        if plan is not None:
+            return plan, choice
+    return None
@@ -0,0 +1,68 @@
+# reduction.py - Cache des niveaux de réduction BKW
+import numpy as np
+
+
+def combine_labels(labels, left, right, sign, modulus):
+    """Étiquettes d'un niveau : labels[left] + sign·labels[right] mod modulus
+
+    sign: None (+1 partout) ou tableau de -1, 0, +1 (0 = ligne recopiée)
+    """
+    if modulus == 2:
+        combined = labels[left] ^ labels[right]
+        if sign is not None:
+            combined = np.where(sign != 0, combined, labels[left])
+        return combined.astype(labels.dtype)
+
+    if sign is None:
+        return (labels[left] + labels[right]) % modulus
+    return (labels[left] + sign * labels[right]) % modulus
+
+
+class ReductionCache:
+    """Niveaux de réduction conservés d'un bloc à l'autre
+
+    Les vecteurs réduits ne dépendent que des vecteurs d'origine : ils sont
+    calculés une seule fois. Chaque niveau garde les indices (left, right) et
+    le signe de la combinaison du niveau précédent dont provient chaque ligne,
+    ce qui permet de répercuter une substitution arrière sur les étiquettes
+    sans refaire la réduction.
+    """
+
+    def __init__(self, vectors, labels, modulus):
+        """
+        vectors: vecteurs d'origine (objet opaque pour le cache)
+        labels: étiquettes d'origine (copiées)
+        modulus: 2 pour LPN, q pour LWE
+        """
+        self.modulus = modulus
+        self.vectors = [vectors]
+        self.labels = [np.array(labels)]
+        self.combinations = [None]
+
+    @property
+    def depth(self):
+        """Nombre de niveaux de réduction calculés"""
+        return len(self.vectors) - 1
+
+    def level(self, depth):
+        """Vecteurs et étiquettes à jour du niveau depth"""
+        return self.vectors[depth], self.labels[depth]
+
+    def push(self, vectors, left, right, sign=None):
+        """Ajoute le niveau suivant, obtenu par combinaison des lignes du dernier niveau"""
+        labels = combine_labels(self.labels[-1], left, right, sign, self.modulus)
+        self.vectors.append(vectors)
+        self.labels.append(labels)
+        self.combinations.append((left, right, sign))
+
+    def patch(self, delta):
+        """Ajoute delta aux étiquettes d'origine et le propage à tous les niveaux"""
+        delta = np.asarray(delta, dtype=self.labels[0].dtype) % self.modulus
+        for depth in range(len(self.labels)):
+            if depth > 0:
+                left, right, sign = self.combinations[depth]
+                delta = combine_labels(delta, left, right, sign, self.modulus)
+            if self.modulus == 2:
+                self.labels[depth] ^= delta
+            else:
+                self.labels[depth] = (self.labels[depth] + delta) % self.modulus
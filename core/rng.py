@@ -0,0 +1,50 @@
+# rng.py - Flux aléatoires reproductibles et génération parallèle
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Taille d'un bloc de génération : chaque bloc a son propre flux SeedSequence,
+# le découpage ne dépend donc pas du nombre de processus
+GENERATION_BLOCK = 1 << 16
+
+
+def fresh_seed():
+    """Graine 63 bits tirée de l'état global (np.random.seed garde le contrôle)"""
+    return int(np.random.randint(0, 2 ** 63 - 1, dtype=np.int64))
+
+
+class SampleStream:
+    """Flux reproductible d'une instance : un flux pour le secret, un par bloc d'échantillons"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        root = np.random.SeedSequence(seed)
+        self.secret_sequence, self.sample_sequence = root.spawn(2)
+
+    def secret_rng(self):
+        """Générateur dédié au tirage du secret"""
+        return np.random.default_rng(self.secret_sequence)
+
+    def draw(self, draw_block, args, n, workers=1):
+        """Tire n échantillons par blocs indépendants, éventuellement en parallèle
+
+        draw_block(args, sequence, size) doit être une fonction de module
+        (sérialisable) qui renvoie un tuple de tableaux de size lignes.
+        Le résultat est identique quel que soit workers.
+        """
+        n_blocks = -(-n // GENERATION_BLOCK)
+        if n_blocks == 0:
+            return draw_block(args, self.sample_sequence, 0)
+
+        sequences = self.sample_sequence.spawn(n_blocks)
+        sizes = [GENERATION_BLOCK] * (n_blocks - 1) + [n - GENERATION_BLOCK * (n_blocks - 1)]
+
+        if workers > 1 and n_blocks > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, n_blocks)) as pool:
+                results = list(pool.map(draw_block, [args] * n_blocks, sequences, sizes))
+        else:
+            results = [draw_block(args, sequence, size)
+                       for sequence, size in zip(sequences, sizes)]
+
+        if len(results) == 1:
+            return results[0]
+        return tuple(np.concatenate(parts) for parts in zip(*results))
@@ -0,0 +1,118 @@
+# spectrum.py - Spectre de Walsh-Hadamard d'un bloc LPN, en mémoire ou par morceaux sur disque
+import os
+import tempfile
+import numpy as np
+from core.utils import walsh_hadamard_transform, top_indices
+
+# Mémoire par défaut pour le spectre d'un bloc (octets) : au-delà, transformée sur disque
+DEFAULT_MEMORY_LIMIT = 1 << 30
+
+# Pic mémoire du calcul en mémoire, en octets par indice du spectre : deux vecteurs
+# int64 (f et n_x(c = 1) dans frequency_vector, puis scores et copie de np.partition)
+IN_MEMORY_BYTES = 16
+
+
+def frequency_vector(keys, labels, bits):
+    """f[x] = Σ (-1)^c sur les échantillons de clé x, par np.bincount entiers
+
+    keys: clés entières des blocs (bit i de la clé = v[start + i])
+    labels: étiquettes 0/1
+    Au plus deux vecteurs de 2^bits entiers int64 à la fois : f = n_x - 2·n_x(c = 1).
+    """
+    size = 1 << bits
+    keys = np.asarray(keys, dtype=np.int64)
+    f = np.bincount(keys, minlength=size)
+    ones = np.bincount(keys[np.asarray(labels) == 1], minlength=size)
+    ones *= 2
+    f -= ones
+    return f
+
+
+def _merge_top(best, candidates, count):
+    """Fusionne deux listes (scores, indices) et garde les count meilleures"""
+    scores = np.concatenate([best[0], candidates[0]])
+    indices = np.concatenate([best[1], candidates[1]])
+    order = np.lexsort((indices, -scores))[:count]
+    return scores[order], indices[order]
+
+
+def chunked_top(keys, labels, bits, count, memory_limit=DEFAULT_MEMORY_LIMIT, directory=None):
+    """Les count meilleurs indices de |f̂| quand le spectre ne tient pas en mémoire
+
+    Le vecteur f (2^bits entiers) est écrit dans un fichier temporaire projeté
+    en mémoire, vu comme une matrice 2^high × 2^low (x = ligne · 2^low + colonne).
+    La transformée est séparable :
+    1. passe 1 : transformée de chaque ligne (bits de poids faible), réécrite ;
+    2. passe 2 : transformée de chaque paquet de colonnes (bits de poids fort),
+       dont on ne garde que les meilleurs scores ; rien n'est réécrit.
+    Chaque passe lit des paquets de memory_limit / 16 indices : au plus deux
+    copies int64 d'un paquet à la fois, soit un pic d'environ memory_limit.
+    Retourne (indices, scores) triés par (-score, indice).
+    directory: dossier du fichier temporaire (None = dossier temporaire du système)
+    """
+    low = bits // 2
+    high = bits - low
+    rows, columns = 1 << high, 1 << low
+
+    # |f̂| ≤ nombre d'échantillons : int32 suffit le plus souvent
+    dtype = np.int32 if len(keys) < 2 ** 31 else np.int64
+    chunk = max(1, memory_limit // IN_MEMORY_BYTES)
+
+    # Clés présentes seulement : f n'est jamais matérialisé en mémoire
+    present, inverse = np.unique(np.asarray(keys, dtype=np.int64), return_inverse=True)
+    signs = 1 - 2 * np.asarray(labels, dtype=np.int64)
+    values = np.bincount(inverse, weights=signs, minlength=len(present)).astype(dtype)
+
+    handle, path = tempfile.mkstemp(suffix='.wht', dir=directory)
+    os.close(handle)
+    try:
+        f = np.memmap(path, dtype=dtype, mode='w+', shape=(rows, columns))
+        f.reshape(-1)[present] = values
+
+        # Passe 1 : lignes contiguës
+        step = max(1, chunk // columns)
+        for first in range(0, rows, step):
+            block = np.array(f[first:first + step])
+            f[first:first + step] = walsh_hadamard_transform(block, inplace=True)
+            del block
+
+        # Passe 2 : paquets de colonnes, transformés comme des lignes
+        best = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        step = max(1, chunk // rows)
+        for first in range(0, columns, step):
+            # Une seule copie int64 du paquet, transformée et valeur absolue sur place
+            scores = np.array(f[:, first:first + step].T, dtype=np.int64, order='C')
+            walsh_hadamard_transform(scores, inplace=True)
+            np.abs(scores, out=scores)
+            width = scores.shape[0]
+
+            # scores[j, r] = |f̂| à l'indice r · 2^low + first + j
+            flat = scores.T.reshape(-1)
+            del scores
+            local = top_indices(flat, count)
+            spectrum_rows, spectrum_columns = np.divmod(local, width)
+            indices = spectrum_rows * columns + first + spectrum_columns
+            best = _merge_top(best, (flat[local], indices), count)
+            del flat
+
+        del f
+    finally:
+        os.remove(path)
+
+    return best[1], best[0]
+
+
+def walsh_hadamard_top(keys, labels, bits, count, memory_limit=DEFAULT_MEMORY_LIMIT,
+                       directory=None):
+    """Les count meilleurs indices de |f̂| pour un bloc de bits bits
+
+    En mémoire si le pic du calcul (IN_MEMORY_BYTES par indice, transformée et
+    valeur absolue sur place) tient dans memory_limit, sinon par morceaux sur
+    disque (chunked_top). Retourne (indices, scores).
+    """
+    if (IN_MEMORY_BYTES << bits) <= memory_limit:
+        scores = walsh_hadamard_transform(frequency_vector(keys, labels, bits), inplace=True)
+        np.abs(scores, out=scores)
+        top = top_indices(scores, count)
+        return top, scores[top]
+    return chunked_top(keys, labels, bits, count, memory_limit, directory)
@@ -0,0 +1,179 @@
+# storage.py - Format binaire d'échantillons sur disque (numpy.memmap)
+import numpy as np
+from core.packed import PackedLPNSamples, pack_bits, unpack_bits, WORD_BITS
+
+MAGIC = b'BKWS'
+VERSION = 1
+HEADER_SIZE = 64
+
+KIND_LPN = 0
+KIND_LWE = 1
+
+# En-tête : type, dimension, nombre d'échantillons, q (2 pour LPN), τ ou σ, graine
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('kind', '<u2'),
+    ('dimension', '<u8'),
+    ('count', '<u8'),
+    ('modulus', '<u8'),
+    ('noise', '<f8'),
+    ('seed', '<i8'),
+])
+
+
+def _row_dtype(modulus):
+    """Plus petit type entier non signé capable de contenir Z_q"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if modulus - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+class SampleFile:
+    """Fichier d'échantillons LPN/LWE ouvert par numpy.memmap
+
+    Structure : en-tête de 64 octets, secret (dimension × int64),
+    puis les lignes denses V et la colonne des étiquettes c.
+    Pour LPN, V est compacté en mots uint64 (voir core.packed).
+    """
+
+    def __init__(self, path, mode='r'):
+        """
+        path: chemin du fichier
+        mode: 'r' lecture seule, 'r+' lecture/écriture, 'c' copie à l'écriture
+        """
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header['magic'][0] != MAGIC:
+            raise ValueError(f"{path} n'est pas un fichier d'échantillons BKW")
+        if header['version'][0] != VERSION:
+            raise ValueError(f"Version de fichier non supportée: {header['version'][0]}")
+
+        header = header[0]
+        self.kind = int(header['kind'])
+        self.dimension = int(header['dimension'])
+        self.count = int(header['count'])
+        self.modulus = int(header['modulus'])
+        self.noise = float(header['noise'])
+        self.seed = None if header['seed'] < 0 else int(header['seed'])
+
+        offset = HEADER_SIZE
+        self.secret = np.memmap(path, dtype='<i8', mode='r', offset=offset,
+                                shape=(self.dimension,)).tolist()
+        offset += 8 * self.dimension
+
+        if self.kind == KIND_LPN:
+            row_dtype, row_width = np.dtype('<u8'), max(1, -(-self.dimension // WORD_BITS))
+        else:
+            row_dtype, row_width = _row_dtype(self.modulus), self.dimension
+
+        # Fichier vide : numpy.memmap refuse les tableaux de taille nulle
+        if self.count == 0:
+            self.V = np.zeros((0, row_width), dtype=row_dtype)
+            self.c = np.zeros(0, dtype=row_dtype if self.kind == KIND_LWE else np.uint8)
+            return
+
+        self.V = np.memmap(path, dtype=row_dtype, mode=mode, offset=offset,
+                           shape=(self.count, row_width))
+        offset += self.V.nbytes
+
+        label_dtype = np.uint8 if self.kind == KIND_LPN else row_dtype
+        self.c = np.memmap(path, dtype=label_dtype, mode=mode, offset=offset,
+                           shape=(self.count,))
+
+    @classmethod
+    def create(cls, path, kind, dimension, count, modulus, noise, secret, seed=None):
+        """Crée un fichier vide de count échantillons, ouvert en écriture"""
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['kind'] = kind
+        header['dimension'] = dimension
+        header['count'] = count
+        header['modulus'] = modulus
+        header['noise'] = noise
+        header['seed'] = -1 if seed is None else seed
+
+        if kind == KIND_LPN:
+            row_bytes = 8 * max(1, -(-dimension // WORD_BITS)) + 1
+        else:
+            row_bytes = _row_dtype(modulus).itemsize * (dimension + 1)
+        total = HEADER_SIZE + 8 * dimension + row_bytes * count
+
+        with open(path, 'wb') as f:
+            f.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+            f.write(np.asarray(secret, dtype='<i8').tobytes())
+            f.truncate(total)
+
+        return cls(path, mode='r+')
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def is_lpn(self):
+        return self.kind == KIND_LPN
+
+    def write_chunk(self, start, V, c):
+        """Écrit un paquet (V, c) dense à partir de la ligne start"""
+        end = start + len(c)
+        if self.is_lpn:
+            self.V[start:end] = pack_bits(V, self.dimension)
+        else:
+            self.V[start:end] = V
+        self.c[start:end] = c
+
+    def iter_chunks(self, chunk_size=100000):
+        """Parcourt le fichier par paquets (V, c) denses"""
+        for start in range(0, self.count, chunk_size):
+            yield self.arrays(start, start + chunk_size)
+
+    def arrays(self, start=0, end=None):
+        """Lignes start à end sous forme dense (V, c)"""
+        end = self.count if end is None else min(end, self.count)
+        if self.is_lpn:
+            V = unpack_bits(self.V[start:end], self.dimension)
+        else:
+            V = np.asarray(self.V[start:end], dtype=np.int64)
+        return V, np.asarray(self.c[start:end], dtype=np.int64)
+
+    def to_packed(self):
+        """Vue compactée (LPN) : les mots restent sur disque, les étiquettes sont copiées"""
+        if not self.is_lpn:
+            raise ValueError("Seuls les fichiers LPN ont une représentation compactée")
+        return PackedLPNSamples(self.V, np.array(self.c, dtype=np.uint8), self.dimension)
+
+    def to_samples(self):
+        """Charge tout le fichier en liste de dictionnaires {'v', 'c'}"""
+        V, c = self.arrays()
+        return [{'v': v, 'c': ci} for v, ci in zip(V.tolist(), c.tolist())]
+
+    def flush(self):
+        if isinstance(self.V, np.memmap):
+            self.V.flush()
+            self.c.flush()
+
+
+def write_samples(path, instance, count, chunk_size=100000):
+    """Génère count échantillons de instance par paquets et les écrit dans path"""
+    if hasattr(instance, 'q'):
+        kind, dimension, modulus, noise = KIND_LWE, instance.n, instance.q, instance.sigma
+    else:
+        kind, dimension, modulus, noise = KIND_LPN, instance.k, 2, instance.tau
+
+    sample_file = SampleFile.create(path, kind, dimension, count, modulus, noise,
+                                    instance.secret, getattr(instance, 'seed', None))
+
+    start = 0
+    for V, c in instance.generate_batches(count, chunk_size):
+        sample_file.write_chunk(start, V, c)
+        start += len(c)
+
+    sample_file.flush()
+    return SampleFile(path)
+
+
+def open_samples(path, mode='r'):
+    """Ouvre un fichier d'échantillons existant"""
+    return SampleFile(path, mode)
@@ -1,6 +1,146 @@
 import numpy as np
+from functools import lru_cache
 from math import exp, sqrt, pi, log
 
+def samples_to_arrays(samples, dtype=np.int64):
+    """Convertit une liste d'échantillons {'v', 'c'} en matrice V et vecteur c"""
+    if not samples:
+        return np.zeros((0, 0), dtype=dtype), np.zeros(0, dtype=dtype)
+    V = np.array([s['v'] for s in samples], dtype=dtype)
+    c = np.array([s['c'] for s in samples], dtype=dtype)
+    return V, c
+
+def arrays_to_samples(V, c):
+    """Convertit une matrice V et un vecteur c en liste d'échantillons {'v', 'c'}"""
+    return [{'v': v, 'c': ci} for v, ci in zip(V.tolist(), c.tolist())]
+
+def encode_blocks(V, start, end, modulus):
+    """Encode chaque bloc V[:, start:end] en entier de base modulus (V[start] poids faible)"""
+    block = np.asarray(V[:, start:end], dtype=np.int64)
+    weights = modulus ** np.arange(end - start, dtype=np.int64)
+    return block @ weights
+
+def signed_class_codes(block, modulus):
+    """Classe ± de chaque ligne d'un bloc mod modulus : (codes, direct)
+    
+    codes: entier identique pour v et -v (le plus petit des deux codes en base
+    modulus, ou un numéro de classe si modulus^b dépasse int64)
+    direct: vrai si v est lui-même le représentant de sa classe
+    """
+    block = np.asarray(block, dtype=np.int64) % modulus
+    negated = (-block) % modulus
+    width = block.shape[1]
+    
+    if modulus ** width <= np.iinfo(np.int64).max:
+        weights = modulus ** np.arange(width, dtype=np.int64)
+        codes, negated_codes = block @ weights, negated @ weights
+        return np.minimum(codes, negated_codes), codes <= negated_codes
+    
+    # Représentant : le plus petit de v et -v dans l'ordre lexicographique
+    rows = np.arange(len(block))
+    first = (block != negated).argmax(axis=1)
+    direct = block[rows, first] <= negated[rows, first]
+    canonical = np.where(direct[:, None], block, negated)
+    
+    # Numéro de classe : rang du représentant parmi les représentants distincts
+    order = np.lexsort(canonical.T[::-1])
+    ordered = canonical[order]
+    is_new = np.zeros(len(block), dtype=np.int64)
+    is_new[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    codes = np.empty(len(block), dtype=np.int64)
+    codes[order] = np.cumsum(is_new)
+    return codes, direct
+
+def group_pairs(keys, key_bits=None):
+    """Groupement par tri stable des clés égales
+    
+    Retourne (membres, représentants) : chaque ligne qui n'est pas la première
+    occurrence de sa clé, associée à cette première occurrence. L'ordre est celui
+    d'un regroupement par dictionnaire (groupes par première apparition, puis
+    membres par indice) : changer l'ordre changerait les représentants des
+    étapes suivantes et corrélerait leur bruit.
+    key_bits: nombre de bits des clés ; ≤ 16 permet un tri par base (radix)
+    """
+    keys = np.asarray(keys)
+    if key_bits is not None and key_bits <= 16:
+        keys = keys.astype(np.uint16)
+    
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    
+    is_first = np.ones(len(keys), dtype=bool)
+    is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    
+    # Représentant = première occurrence du groupe (l'ordre stable la place en tête)
+    group_start = np.maximum.accumulate(np.where(is_first, np.arange(len(keys)), 0))
+    representative_of = np.empty(len(keys), dtype=np.int64)
+    representative_of[order] = order[group_start]
+    
+    # Ordre du dictionnaire : par représentant, puis par indice (tri stable)
+    members = np.argsort(representative_of, kind='stable')
+    members = members[members != representative_of[members]]
+    
+    return members, representative_of[members]
+
+def all_pairs(keys, cap=None, max_pairs=None, key_bits=None):
+    """Toutes les paires (i, j) de lignes de même clé, i après j (combinaison LF2)
+    
+    cap: nombre maximal de paires par groupe (None = toutes)
+    max_pairs: borne globale ; le plafond par groupe est abaissé pour la respecter
+    key_bits: nombre de bits des clés ; ≤ 16 permet un tri par base (radix)
+    """
+    keys = np.asarray(keys)
+    if key_bits is not None and key_bits <= 16:
+        keys = keys.astype(np.uint16)
+    
+    n = len(keys)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    
+    is_first = np.ones(n, dtype=bool)
+    is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    starts = np.flatnonzero(is_first)
+    group_id = np.cumsum(is_first) - 1
+    rank = np.arange(n) - starts[group_id]
+    sizes = np.diff(np.append(starts, n))
+    
+    # Abaisser le plafond par groupe si la borne globale est dépassée
+    group_pairs_count = sizes * (sizes - 1) // 2
+    if max_pairs is not None:
+        def total(limit):
+            return np.minimum(group_pairs_count, limit).sum()
+        
+        if total(group_pairs_count.max(initial=0) if cap is None else cap) > max_pairs:
+            low, high = 0, int(group_pairs_count.max(initial=0) if cap is None else cap)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if total(middle) <= max_pairs:
+                    low = middle
+                else:
+                    high = middle - 1
+            cap = low
+    
+    # Une ligne de rang r forme r paires avec les lignes de rang inférieur ;
+    # les paires d'un groupe précédant celles du rang r sont au nombre de r(r-1)/2
+    keep = rank >= 1
+    if cap is not None:
+        keep &= rank * (rank - 1) // 2 < cap
+    
+    positions = np.flatnonzero(keep)
+    counts = rank[positions]
+    n_pairs = int(counts.sum())
+    
+    offsets = np.arange(n_pairs) - np.repeat(np.cumsum(counts) - counts, counts)
+    left = np.repeat(order[positions], counts)
+    right = order[np.repeat(starts[group_id[positions]], counts) + offsets]
+    
+    if cap is not None:
+        within_group = np.repeat(counts * (counts - 1) // 2, counts) + offsets
+        mask = within_group < cap
+        left, right = left[mask], right[mask]
+    
+    return left, right
+
 def hamming_weight(vector):
     """Calcule le poids de Hamming"""
     return sum(1 for x in vector if x != 0)
@@ -32,23 +172,141 @@ def log_likelihood(error, sigma, q):
         return -1000
     return log(prob * q)
 
+@lru_cache(maxsize=128)
+def log_likelihood_table(sigma, q):
+    """Table des q scores log_likelihood, indexée par l'erreur modulo q
+    
+    Les tables sont conservées dans un cache LRU par (σ, q).
+    """
+    errors = np.arange(q, dtype=np.int64)
+    centered = np.where(errors > q // 2, errors - q, errors).astype(np.float64)
+    
+    # Même repliement que gaussian_pdf : K = 3 périodes de chaque côté
+    shifts = np.arange(-3, 4, dtype=np.float64) * q
+    prob = (np.exp(-((centered[:, None] + shifts) ** 2) / (2 * sigma ** 2)).sum(axis=1)
+            / (sigma * sqrt(2 * pi)))
+    
+    with np.errstate(divide='ignore'):
+        table = np.where(prob < 1e-20, -1000.0, np.log(prob * q))
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=64)
+def candidate_grid(dim, q):
+    """Les q^dim candidats de Z_q^dim en matrice (ordre de itertools.product)
+    
+    Les grilles sont conservées dans un cache LRU par (dim, q) et en lecture seule.
+    """
+    grid = np.indices((q,) * dim, dtype=np.int64).reshape(dim, q ** dim).T.copy()
+    grid.flags.writeable = False
+    return grid
+
+def top_indices(scores, count):
+    """Indices des count plus grands scores, triés par (-score, indice)"""
+    count = min(count, len(scores))
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if count == 1:
+        return np.array([int(np.argmax(scores))], dtype=np.int64)
+    
+    # Égalités au seuil départagées par indice croissant
+    threshold = np.partition(scores, len(scores) - count)[len(scores) - count]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[:count - len(above)]
+    top = np.concatenate([above, tied])
+    top = top[np.lexsort((top, -scores[top]))]
+    return top.astype(np.int64)
+
 def majority_vote(values):
     """Vote à la majorité"""
     return max(set(values), key=values.count)
 
-def walsh_hadamard_transform(f):
-    """Transformée de Walsh-Hadamard rapide"""
-    n = len(f)
-    if n == 1:
-        return f
+def sprt_margin(error_rate, alpha):
+    """Écart |#1 - #0| à partir duquel le SPRT de Wald tranche entre s = 0 et s = 1
+
+    Chaque vote est juste avec probabilité 1 - error_rate ; alpha est le risque d'erreur visé.
+    """
+    return log((1 - alpha) / alpha) / log((1 - error_rate) / error_rate)
+
+def hoeffding_margin(count, alpha):
+    """Écart |#1 - #0| suffisant après count votes, sans connaître le bruit
+
+    Borne de Hoeffding au risque alpha / (m(m+1)) pour chaque m : le risque
+    total reste inférieur à alpha quel que soit l'instant d'arrêt.
+    """
+    count = np.asarray(count, dtype=np.float64)
+    return np.sqrt(2 * count * np.log(count * (count + 1) / alpha))
+
+def sequential_step(votes, alpha, error_rate=None, margin=0, count=0):
+    """Suite d'un vote séquentiel : votes reçus après count votes d'écart margin (#1 - #0)
+
+    error_rate connu : SPRT ; sinon borne de Hoeffding (sur le nombre total de votes).
+    Retourne (écart, votes comptés, votes du paquet utilisés, décision atteinte).
+    """
+    votes = np.asarray(votes, dtype=np.int64)
+    if len(votes) == 0:
+        return margin, count, 0, False
+
+    margins = margin + np.cumsum(2 * votes - 1)
+    counts = count + np.arange(1, len(votes) + 1)
+    if error_rate is not None and 0 < error_rate < 0.5:
+        needed = sprt_margin(error_rate, alpha)
+    else:
+        needed = hoeffding_margin(counts, alpha)
+
+    decided = np.flatnonzero(np.abs(margins) >= needed)
+    used = int(decided[0]) + 1 if len(decided) else len(votes)
+    return int(margins[used - 1]), int(counts[used - 1]), used, len(decided) > 0
+
+def sequential_vote(votes, alpha, error_rate=None):
+    """Vote majoritaire séquentiel sur des bits reçus dans l'ordre
+
+    error_rate connu : SPRT ; sinon borne de Hoeffding.
+    Retourne (décision, nombre de votes utilisés) ; sans arrêt anticipé, majorité
+    sur tous les votes (égalité → 0).
+    """
+    margin, _, used, _ = sequential_step(votes, alpha, error_rate)
+    return int(margin > 0), used
+
+def walsh_hadamard_transform(f, inplace=False):
+    """Transformée de Walsh-Hadamard rapide (papillons itératifs en place)
+    
+    f: vecteur de taille 2^n, ou matrice (m, 2^n) pour transformer m vecteurs à la fois
+    inplace: si True et f est déjà du type de calcul (int32/int64/float64), f est écrasé
+    Retourne f̂[s] = Σ_x f[x]·(-1)^<x,s> (indices en ordre naturel)
+    """
+    f = np.asarray(f)
+    if np.issubdtype(f.dtype, np.floating):
+        dtype = np.float64
+    elif inplace and f.dtype == np.int64:
+        dtype = np.int64
+    else:
+        # |f̂| ≤ Σ|f| : int32 suffit tant que la somme tient, et divise le trafic mémoire par 2
+        bound = 0
+        if f.size:
+            bound = max(abs(int(f.max())), abs(int(f.min()))) * f.shape[-1]
+            if bound >= 2 ** 31:
+                bound = np.abs(f.astype(np.int64)).sum(axis=-1).max()
+        dtype = np.int32 if bound < 2 ** 31 else np.int64
+    result = f if inplace and f.dtype == dtype else f.astype(dtype)
+    
+    n = result.shape[-1]
+    if n & (n - 1):
+        raise ValueError(f"La taille doit être une puissance de 2, reçu {n}")
     
-    h = n // 2
-    f_even = walsh_hadamard_transform([f[i] for i in range(0, n, 2)])
-    f_odd = walsh_hadamard_transform([f[i] for i in range(1, n, 2)])
+    rows = result.reshape(-1, n)
+    scratch = np.empty((rows.shape[0], n // 2), dtype=dtype)
     
-    result = [0] * n
-    for i in range(h):
-        result[i] = f_even[i] + f_odd[i]
-        result[i + h] = f_even[i] - f_odd[i]
+    h = 1
+    while h < n:
+        # Paires (x, y) à distance h : x ← x + y, y ← x - y
+        pairs = rows.reshape(rows.shape[0], n // (2 * h), 2, h)
+        x = pairs[:, :, 0, :]
+        y = pairs[:, :, 1, :]
+        saved = scratch.reshape(rows.shape[0], n // (2 * h), h)
+        np.copyto(saved, x)
+        x += y
+        np.subtract(saved, y, out=y)
+        h *= 2
     
-    return result
\ No newline at end of file
+    return result
@@ -6,6 +6,8 @@ import time
 import numpy as np
 from core.lpn import LPNInstance
 from core.lwe import LWEInstance
+from core.utils import arrays_to_samples
+from core.planner import plan_params, suggest_split, fallback_plan
 from weapons.bkw_standard import BKWStandard
 from weapons.bkw_lf1 import BKWLF1
 from weapons.bkw_lwe import BKWLWE
@@ -13,6 +15,12 @@ from weapons.lms_bkw import LMSBKW
 from weapons.coded_bkw import CodedBKW
 from weapons.coded_bkw_sieving import CodedBKWSieving
 
+# Intervalle minimal (s) entre deux rafraîchissements de la console
+LOG_REFRESH = 0.05
+
+# Plafond d'échantillons générés par l'interface (params['max_samples'] le remplace)
+GUI_MAX_SAMPLES = 200000
+
 class MissionBKW:
     def __init__(self, root):
         self.root = root
@@ -20,6 +28,7 @@ class MissionBKW:
         self.root.geometry("1400x900")
         self.root.configure(bg='#0f172a')
         self.root.minsize(1200, 700)
+        self._last_log_refresh = 0.0
         
         # Variables de style améliorées
         self.colors = {
@@ -1253,11 +1262,54 @@ class MissionBKW:
         self.log_text.insert(tk.END, f"[{timestamp}] ", 'time')
         self.log_text.insert(tk.END, f"{message}\n", msg_type)
         
-        # Faire défiler jusqu'en bas
-        self.log_text.see(tk.END)
+        # Faire défiler et rafraîchir l'interface au plus toutes les LOG_REFRESH secondes
+        now = time.perf_counter()
+        if msg_type in ('error', 'phase') or now - self._last_log_refresh >= LOG_REFRESH:
+            self._last_log_refresh = now
+            self.log_text.see(tk.END)
+            self.root.update_idletasks()
+    
+    def plan_samples(self, params):
+        """Nombre d'échantillons estimé par le modèle de coût (core.planner), plafonné
         
-        # Mettre à jour l'interface
-        self.root.update_idletasks()
+        Si le plan dépasse le plafond, un découpage ou un distingueur qui tient est
+        retenu à la place. Retourne (échantillons, paramètres à utiliser).
+        """
+        if params['type'] == 'LPN':
+            options = {'solver': 'wht' if self.selected_weapon.startswith('LF1') else 'majority'}
+        else:
+            options = {'distinguisher': params.get('distinguisher', 'likelihood')}
+        
+        success = params.get('success', 0.9)
+        plan = plan_params(params, success, **options)
+        self.add_log(f"Plan: {plan['samples']} échantillons pour {success:.0%} de réussite "
+                     f"(biais final {plan['bias']:.3g}, mémoire ~{plan['memory'] / 2**20:.1f} Mo)", 'info')
+        
+        best = suggest_split(params, params.get('memory_budget'), success, **options)
+        if best is not None and (best['a'], best['b']) != (params['a'], params['b']):
+            self.add_log(f"💡 Découpage conseillé: a={best['a']}, b={best['b']} "
+                         f"({best['samples']} échantillons)", 'info')
+        
+        cap = params.get('max_samples', GUI_MAX_SAMPLES)
+        if plan['samples'] <= cap:
+            return plan['samples'], params
+        
+        self.add_log(f"⚠️ Plan irréalisable: {plan['samples']} échantillons demandés, "
+                     f"plafond {cap}", 'warning')
+        fallback = fallback_plan(params, cap, params.get('memory_budget'), success, **options)
+        if fallback is None:
+            self.add_log(f"⚠️ Aucun découpage ne tient: échantillons plafonnés à {cap}, "
+                         f"réussite peu probable", 'warning')
+            return cap, params
+        
+        plan, options = fallback
+        params = dict(params, a=plan['a'], b=plan['b'])
+        if 'distinguisher' in options:
+            params['distinguisher'] = options['distinguisher']
+        self.add_log(f"↪️ Repli: a={plan['a']}, b={plan['b']}"
+                     + (f", distingueur {options['distinguisher']}" if 'distinguisher' in options else '')
+                     + f" ({plan['samples']} échantillons)", 'warning')
+        return plan['samples'], params
     
     def execute_mission(self):
         """Exécute la mission avec l'algorithme sélectionné"""
@@ -1298,27 +1350,43 @@ class MissionBKW:
             
             if params['type'] == 'LPN':
                 if secret is None:
-                    instance = LPNInstance(params['k'], params['tau'])
+                    instance = LPNInstance(params['k'], params['tau'], seed=params.get('seed'))
                     secret = instance.secret
                 else:
-                    instance = LPNInstance(params['k'], params['tau'], secret)
+                    instance = LPNInstance(params['k'], params['tau'], secret, seed=params.get('seed'))
                 
-                sample_count = int(20 * (2 ** params['b']) * params['a'])
+                sample_count, params = self.plan_samples(params)
                 self.add_log(f"Secret: {''.join(map(str, secret))}", 'secret')
                 self.add_log(f"Échantillons: {sample_count}", 'info')
                 
             else:  # LWE
                 if secret is None:
-                    instance = LWEInstance(params['n'], params['q'], params['sigma'])
+                    instance = LWEInstance(params['n'], params['q'], params['sigma'], seed=params.get('seed'))
                     secret = instance.secret
                 else:
-                    instance = LWEInstance(params['n'], params['q'], params['sigma'], secret)
+                    instance = LWEInstance(params['n'], params['q'], params['sigma'], secret,
+                                           seed=params.get('seed'))
                 
-                sample_count = int(50 * (2 ** params['b']))
+                sample_count, params = self.plan_samples(params)
                 self.add_log(f"Secret: {secret}", 'secret')
                 self.add_log(f"Échantillons: {sample_count}", 'info')
             
-            samples = instance.generate_samples(sample_count)
+            # Graine affichée pour pouvoir rejouer l'exécution à l'identique
+            self.add_log(f"Graine: {instance.seed}", 'info')
+            
+            if params.get('occupancy'):
+                # Tirer des paquets jusqu'à remplir les seaux du premier bloc
+                self.add_log(f"Tirage jusqu'à {params['occupancy']:.0%} de seaux occupés", 'info')
+                oracle = instance.oracle()
+                cap = params.get('max_samples', GUI_MAX_SAMPLES)
+                V, c = oracle.until_occupancy(0, params['b'], params['occupancy'], max_samples=cap)
+                reached = oracle.occupancy(V, 0, params['b'])
+                if reached < params['occupancy']:
+                    self.add_log(f"⚠️ Plafond de {cap} échantillons atteint: {reached:.0%} de seaux "
+                                 f"occupés au lieu de {params['occupancy']:.0%}", 'warning')
+                samples = arrays_to_samples(V, c)
+            else:
+                samples = instance.generate_samples(sample_count)
             self.add_log(f"✅ {len(samples)} échantillons générés", 'success')
             
             self.progress_var.set(30)
@@ -1477,6 +1545,7 @@ class MissionBKW:
         
         self.add_log("")
         self.add_log("🔄 Cliquez sur 'Retour' pour recommencer", 'info')
+        self.log_text.see(tk.END)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,64 +1,283 @@
 # bkw_lf1.py - Version corrigée
 import numpy as np
-from core.utils import walsh_hadamard_transform
+from core.spectrum import walsh_hadamard_top, DEFAULT_MEMORY_LIMIT
+from core.packed import PackedLPNSamples, pack_bits
+from core.reduction import ReductionCache
 from weapons.bkw_standard import BKWStandard
 
+# En dessous de ce nombre d'échantillons de vérification, aucun secret n'est déclaré vérifié
+MIN_HOLDOUT = 32
+
+def rank_vectors(depth, top_k, limit=None):
+    """Vecteurs de rangs (un par bloc, < top_k) par somme croissante
+    
+    À somme égale, les premiers blocs résolus (les plus bruités) changent d'abord.
+    limit(prefix): nombre de candidats du bloc suivant ce préfixe, s'il est connu
+    (top_k sinon) ; il est relu à chaque branche, donc les candidats découverts
+    pendant le parcours élaguent les vecteurs qui restent.
+    """
+    limit = limit or (lambda prefix: top_k)
+    for total in range(depth * (top_k - 1) + 1):
+        yield from _compositions(total, depth, top_k, (), limit)
+
+def _compositions(total, parts, top_k, prefix, limit):
+    if total > parts * (top_k - 1):
+        return
+    largest = min(total, top_k - 1, limit(prefix) - 1)
+    if parts == 1:
+        if total <= largest:
+            yield prefix + (total,)
+        return
+    for first in range(largest, -1, -1):
+        yield from _compositions(total - first, parts - 1, top_k, prefix + (first,), limit)
+
 class BKWLF1(BKWStandard):
     """LF1: BKW avec transformée de Walsh-Hadamard - Version corrigée"""
     
+    def __init__(self, params, log_callback=None):
+        super().__init__(params, log_callback)
+        
+        # Décodage en liste : lf1_top_k candidats par bloc, vérifiés sur
+        # lf1_holdout échantillons d'origine (1 = arg-max seul)
+        self.top_k = params.get('lf1_top_k', 4)
+        self.holdout = params.get('lf1_holdout', 256)
+        self.max_attempts = params.get('lf1_max_attempts', 32)
+        
+        # Spectre d'un bloc au-delà de lf1_memory_limit octets : transformée
+        # par morceaux dans un fichier temporaire de lf1_spill_dir
+        self.memory_limit = params.get('lf1_memory_limit', DEFAULT_MEMORY_LIMIT)
+        self.spill_dir = params.get('lf1_spill_dir')
+    
+    def solve(self, samples, true_secret=None):
+        """Résolution avec décodage en liste et retour arrière si la vérification échoue"""
+        if self.top_k <= 1:
+            return super().solve(samples, true_secret)
+        
+        try:
+            self.samples_used = {}
+            packed = PackedLPNSamples.from_samples(samples, self.k)
+            
+            # Échantillons de vérification : copie des dernières lignes, jamais
+            # substituée. Elles restent aussi dans la réduction : les retirer
+            # coûte plus d'échantillons réduits que la corrélation n'en fausse
+            holdout_size = min(self.holdout, len(packed) // 8)
+            if holdout_size < MIN_HOLDOUT:
+                holdout_size = 0
+            holdout = packed.take(np.arange(len(packed) - holdout_size, len(packed)))
+            original_samples = packed
+            
+            cache = None
+            if self.use_cache:
+                cache = ReductionCache(original_samples.words, original_samples.labels, 2)
+            
+            self.log("="*60, 'info')
+            self.log("🚀 DÉBUT DE LA RÉSOLUTION LPN AVEC LF1 (DÉCODAGE EN LISTE)", 'info')
+            self.log(f"📊 Paramètres: k={self.k}, a={self.a}, b={self.b}, "
+                     f"{self.top_k} candidats par bloc, {holdout_size} échantillons de vérification", 'info')
+            if true_secret is not None:
+                self.log(f"🔑 Secret à retrouver: {''.join(map(str, true_secret))}", 'info')
+            self.log("="*60, 'info')
+            
+            with self.log.phase("Décodage en liste"):
+                found_secret = self.list_decode(original_samples, cache, holdout, true_secret)
+            
+            self.log(f"\n{'='*60}", 'info')
+            self.log("🏁 RÉSOLUTION TERMINÉE", 'info')
+            self.log(f"🔑 Secret final trouvé: {''.join(map(str, found_secret))}", 'info')
+            
+            if true_secret is not None:
+                correct_total = sum(1 for i in range(self.k) if found_secret[i] == true_secret[i])
+                accuracy = (correct_total / self.k) * 100
+                self.log(f"📈 Précision globale: {correct_total}/{self.k} ({accuracy:.1f}%)",
+                        'success' if accuracy > 90 else 'warning')
+            
+            return found_secret
+        
+        except Exception as e:
+            self.log(f"❌ Erreur dans solve(): {str(e)}", 'error')
+            return [0] * self.k
+        
+        finally:
+            self.sharding.close()
+    
+    def list_decode(self, original_samples, cache, holdout, true_secret=None):
+        """Essaie les combinaisons de candidats par somme de rangs croissante
+        
+        Chaque secret complet est vérifié sur holdout. Pour passer d'une
+        combinaison à la suivante, on annule les substitutions arrière au-delà du
+        préfixe commun (XOR de la même contribution) ; les candidats d'un bloc
+        sont calculés une fois par préfixe. Les phases de chaque bloc sont
+        affichées comme dans BKWStandard.solve, et le résultat par bloc à la fin.
+        """
+        blocks = list(range(self.a, 0, -1))
+        last = len(blocks) - 1
+        memo = {}
+        applied = []
+        
+        found_secret = [0] * self.k
+        best_secret, best_weight = list(found_secret), None
+        threshold = self.acceptance_threshold(len(holdout))
+        attempts = 0
+        
+        # Trop peu d'échantillons pour vérifier : premier secret complet, sans vérification
+        verify = len(holdout) >= MIN_HOLDOUT and threshold >= 0
+        if not verify:
+            self.log(f"⚠️ {len(holdout)} échantillons de vérification (minimum {MIN_HOLDOUT}) : "
+                     f"candidats de rang 0 conservés sans vérification", 'warning')
+        
+        # Rangs bornés par le nombre réel de candidats de chaque préfixe déjà calculé
+        limit = lambda prefix: len(memo[prefix]) if prefix in memo else self.top_k
+        for ranks in rank_vectors(len(blocks), self.top_k, limit):
+            # Revenir au plus long préfixe commun avec la combinaison précédente
+            common = 0
+            while common < len(applied) and applied[common][0] == ranks[common]:
+                common += 1
+            while len(applied) > common:
+                self.undo_substitution(original_samples, cache, applied.pop()[1])
+            
+            complete = True
+            for depth, block in enumerate(blocks):
+                block_start = (block - 1) * self.b
+                block_end = block * self.b
+                
+                prefix = ranks[:depth]
+                if prefix not in memo:
+                    self.log(f"\n{'='*50}", 'info')
+                    self.log(f"🔷 BLOC {block}/{self.a} - Début du traitement"
+                             + (f" (rangs précédents {list(prefix)})" if any(prefix) else ''), 'info')
+                    self.log(f"📐 Positions: {block_start} à {block_end}", 'info')
+                    
+                    self.log(f"\n📉 PHASE 1: Réduction pour les blocs 1 à {block-1}", 'info')
+                    with self.log.phase(f"Réduction (bloc {block})"):
+                        temp_samples = self.reduce_for_block(original_samples, cache, block)
+                    
+                    self.log(f"\n🔍 PHASE 2: Résolution du bloc {block}", 'info')
+                    with self.log.phase(f"Résolution (bloc {block})"):
+                        memo[prefix] = (self.block_candidates(temp_samples, block_start, block_end,
+                                                              self.top_k) or [[0] * self.b])
+                    self.log(f"  Candidats du bloc {block}: "
+                             f"{[''.join(map(str, c)) for c in memo[prefix]]}", 'info')
+                
+                if ranks[depth] >= len(memo[prefix]):
+                    complete = False
+                    break
+                found_secret[block_start:block_end] = memo[prefix][ranks[depth]]
+                
+                if depth < last and len(applied) == depth:
+                    self.log.detail("\n↩️ PHASE 3: Substitution arrière (bloc {}, rang {})",
+                                    block, ranks[depth])
+                    contribution = self.back_substitution(original_samples, found_secret,
+                                                          block_start, block_end)
+                    if cache is not None:
+                        cache.patch(contribution)
+                    applied.append((ranks[depth], contribution))
+            
+            if not complete:
+                continue
+            
+            if not verify:
+                best_secret = list(found_secret)
+                break
+            
+            # Secret complet : poids du résidu c ⊕ <v, s> sur les échantillons de vérification
+            attempts += 1
+            weight = self.residual_weight(holdout, found_secret)
+            if best_weight is None or weight < best_weight:
+                best_secret, best_weight = list(found_secret), weight
+            
+            if weight <= threshold:
+                self.log(f"✅ Secret vérifié (essai {attempts}, rangs {list(ranks)}): "
+                         f"résidu {weight}/{len(holdout)}", 'success')
+                break
+            
+            self.log.detail("  ↩️ Essai {} rejeté: résidu {}/{} (seuil {:.1f})",
+                            attempts, weight, len(holdout), threshold, msg_type='warning')
+            if attempts >= self.max_attempts:
+                self.log(f"⚠️ {attempts} essais sans vérification : meilleur résidu conservé",
+                         'warning')
+                break
+        else:
+            if verify:
+                self.log(f"⚠️ {attempts} essais sans vérification : meilleur résidu conservé",
+                         'warning')
+        
+        # Résultat de chaque bloc pour le secret retenu
+        for block in blocks:
+            self.report_block(block, best_secret[(block - 1) * self.b:block * self.b], true_secret)
+        return best_secret
+    
+    def acceptance_threshold(self, size):
+        """Résidu maximal accepté : un mauvais secret (résidus uniformes) passe avec probabilité ≤ stop_error"""
+        return size / 2 - np.sqrt(size * np.log(1 / self.stop_error) / 2)
+    
+    def residual_weight(self, holdout, secret):
+        """Nombre d'échantillons de vérification tels que c ≠ <v, s> (vectorisé par mots)"""
+        if len(holdout) == 0:
+            return 0
+        products = holdout.inner_products(pack_bits(np.asarray(secret, dtype=np.uint8), self.k))
+        return int(np.count_nonzero(products != holdout.labels))
+    
+    def undo_substitution(self, original_samples, cache, contribution):
+        """Annule une substitution arrière (le XOR est sa propre inverse)"""
+        original_samples.labels ^= contribution
+        if cache is not None:
+            cache.patch(contribution)
+    
     def solve_block(self, samples, start, end):
         """Résout avec Walsh-Hadamard au lieu de majorité"""
-        self.log("✨ Application Walsh-Hadamard", 'info')
+        candidates = self.block_candidates(samples, start, end, 1)
+        if not candidates:
+            return [0] * (end - start)
+        
+        result = candidates[0]
+        self.log(f"🔑 Bloc trouvé: {result}", 'success')
+        return result
+    
+    def block_candidates(self, samples, start, end, count):
+        """Les count meilleurs candidats du bloc selon |f̂|, du meilleur au moins bon"""
+        self.log.detail("✨ Application Walsh-Hadamard")
         
         if not samples:
             self.log("⚠️ Aucun échantillon pour Walsh-Hadamard", 'warning')
-            return [0] * (end - start)
+            return []
         
         block_size = end - start
-        size = 2 ** block_size
-        
-        # Construire f(x)
-        f = [0] * size
-        sample_count = 0
         
-        for sample in samples:
-            try:
-                v_block = sample['v'][start:end]
-                
-                # Convertir en index
-                index = sum((v_block[i] << (block_size - 1 - i)) for i in range(block_size))
-                
-                # Ajouter contribution
-                f[index] += (-1) ** sample['c']
-                sample_count += 1
-            except:
-                continue
+        # Clés des blocs et étiquettes
+        if isinstance(samples, PackedLPNSamples):
+            # Clé compactée : bit i de l'index = v[start + i]
+            keys = samples.block_keys(start, end).astype(np.int64)
+            labels = samples.labels
+        else:
+            keys, labels = [], []
+            for sample in samples:
+                try:
+                    v_block = sample['v'][start:end]
+                    
+                    # Convertir en index (bit i de l'index = v[start + i])
+                    keys.append(sum((v_block[i] << i) for i in range(block_size)))
+                    labels.append(sample['c'])
+                except:
+                    continue
         
+        sample_count = len(keys)
         if sample_count == 0:
             self.log("❌ Aucun échantillon valide pour Walsh-Hadamard", 'error')
-            return [0] * block_size
+            return []
         
-        self.log(f"📊 {sample_count} échantillons utilisés pour la transformée", 'info')
+        self.log.detail("📊 {} échantillons utilisés pour la transformée", sample_count)
+        self.samples_used[start // self.b + 1] = sample_count
         
-        # Transformée
+        # Transformée : f construit par bincount, spectre sur disque s'il dépasse memory_limit
         try:
-            f_hat = walsh_hadamard_transform(f)
-            
-            # Trouver maximum
-            max_idx = max(range(size), key=lambda i: abs(f_hat[i]))
-            max_val = abs(f_hat[max_idx])
+            top, scores = walsh_hadamard_top(keys, labels, block_size, count,
+                                             self.memory_limit, self.spill_dir)
             
-            self.log(f"🎯 Maximum trouvé à l'index {max_idx} (valeur: {max_val:.2f})", 'info')
-            
-            # Convertir en bits
-            block_secret = []
-            for i in range(block_size - 1, -1, -1):
-                block_secret.append((max_idx >> i) & 1)
-            
-            result = list(reversed(block_secret))
-            self.log(f"🔑 Bloc trouvé: {result}", 'success')
-            return result
+            self.log.detail("🎯 Maximum trouvé à l'index {} (valeur: {:.2f})", top[0], scores[0])
             
+            # Convertir en bits (bit i de l'index = s[start + i])
+            return [[(index >> i) & 1 for i in range(block_size)] for index in top.tolist()]
+        
         except Exception as e:
             self.log(f"❌ Erreur dans Walsh-Hadamard: {str(e)}", 'error')
-            return [0] * block_size
\ No newline at end of file
+            return []
@@ -1,269 +1,669 @@
 # bkw_lwe.py - Version améliorée
 import numpy as np
-from core.utils import mod_subtract, mod_add, hamming_weight, log_likelihood
+from core.utils import (log_likelihood_table, candidate_grid,
+                        samples_to_arrays, encode_blocks,
+                        signed_class_codes, top_indices)
+from core.reduction import ReductionCache
+from core.logger import WeaponLogger
+from core.planner import FFT_MAX_CELLS
+from core.parallel import (ShardedReduction, SharedArrays, attach_shared, signed_class_hash,
+                           merge_by_row, MIN_PARALLEL_CELLS)
+
+# Lignes traitées à la fois par la substitution arrière
+BACK_SUBSTITUTION_CHUNK = 1 << 16
+
+# Lignes lues à la fois par la réduction (fichier d'échantillons projeté en mémoire)
+REDUCTION_CHUNK = 1 << 16
+
+# Échantillons notés entre deux contrôles de l'arrêt séquentiel
+SEQUENTIAL_BATCH = 32
+
+# Paires (candidat, échantillon) notées à la fois par le test exhaustif
+SCORING_CELLS = 1 << 22
+
+# Premier paquet d'échantillons de la recherche élaguée (doublé ensuite)
+PRUNING_BATCH = 64
+
+
+def likelihood_scores(group_V, group_c, candidates, scores, q):
+    """Score de chaque candidat : Σ scores[(c - <v, s>) mod q] sur les échantillons
+    
+    Les erreurs de toutes les paires (candidat, échantillon) viennent d'un
+    produit matriciel, par paquets d'au plus SCORING_CELLS paires.
+    """
+    totals = np.zeros(len(candidates), dtype=np.float64)
+    if len(group_c) == 0:
+        return totals
+    
+    step = max(1, SCORING_CELLS // len(group_c))
+    for lo in range(0, len(candidates), step):
+        errors = (group_c - candidates[lo:lo + step] @ group_V.T) % q
+        totals[lo:lo + step] = scores[errors].sum(axis=1)
+    return totals
+
+def score_candidate_slice(spec, rows, positions, lo, hi, search_range, scores, q):
+    """Tâche du test parallèle : 3 meilleurs candidats [lo, hi) d'un motif (indices, scores)"""
+    with attach_shared(spec) as shared:
+        group_V = shared['block'][rows][:, positions]
+        group_c = shared['c'][rows]
+    
+    candidates = candidate_grid(len(positions), search_range)[lo:hi]
+    totals = likelihood_scores(group_V, group_c, candidates, scores, q)
+    top = top_indices(totals, 3)
+    return top + lo, totals[top]
+
+def signed_collision_pairs(block, q):
+    """Collisions ± des lignes d'un bloc, dans l'ordre de parcours des lignes
+    
+    Chaque ligne est combinée avec la ligne en attente de même clé (sign = -1)
+    ou de clé opposée (sign = +1), sinon elle devient la ligne en attente de sa
+    clé ; une ligne nulle est recopiée (sign = 0). Retourne (left, right, sign)
+    en indices locaux.
+    
+    Une ligne appariée libère sa classe ± : dans chaque classe, les occurrences
+    successives s'apparient donc deux à deux (1re avec 2e, 3e avec 4e, ...), ce
+    qu'un tri stable des codes de classe donne sans parcours ligne par ligne.
+    """
+    block = np.asarray(block, dtype=np.int64) % q
+    classes, direct = signed_class_codes(block, q)
+    zero = np.flatnonzero(~block.any(axis=1))
+    
+    # Tri par base (radix) quand les codes tiennent sur 16 bits
+    active = np.flatnonzero(block.any(axis=1))
+    keys = classes[active]
+    if q ** block.shape[1] <= 1 << 16:
+        keys = keys.astype(np.uint16)
+    order = active[np.argsort(keys, kind='stable')]
+    
+    sorted_classes = classes[order]
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = sorted_classes[1:] != sorted_classes[:-1]
+    group_start = np.maximum.accumulate(np.where(is_first, np.arange(len(order)), 0))
+    second = np.flatnonzero((np.arange(len(order)) - group_start) % 2 == 1)
+    
+    left, right = order[second], order[second - 1]
+    # Même orientation : même clé (v - v') ; sinon clé opposée (v + v')
+    sign = np.where(direct[left] == direct[right], -1, 1)
+    
+    left = np.concatenate([left, zero])
+    right = np.concatenate([right, zero])
+    sign = np.concatenate([sign, np.zeros(len(zero), dtype=np.int64)])
+    
+    scan = np.argsort(left, kind='stable')
+    return left[scan], right[scan], sign[scan]
 
 class BKWLWE:
     """BKW adapté pour LWE - Version avec affichage détaillé"""
     
+    # Les variantes dont la réduction n'est pas une combinaison ±1 exacte
+    # des lignes d'origine désactivent le cache de réduction
+    supports_reduction_cache = True
+    
     def __init__(self, params, log_callback=None):
         self.params = params
-        self.log = log_callback or print
+        # Journal à niveaux : 'quiet', 'summary', 'verbose' (défaut) ou 'debug'
+        self.log = WeaponLogger.wrap(log_callback, params.get('log_level', 'verbose'))
         self.a = params['a']
         self.b = params['b']
         self.n = params['n']
         self.q = params['q']
         self.sigma = params['sigma']
         
+        # Distingueur du bloc : 'likelihood' (test exhaustif) ou 'fft'
+        self.distinguisher = params.get('distinguisher', 'likelihood')
+        
+        # Conserver les niveaux de réduction d'un bloc à l'autre
+        self.use_cache = params.get('reduction_cache', True) and self.supports_reduction_cache
+        
+        # Réduction répartie par classes ± de clés sur workers processus
+        self.sharding = ShardedReduction(params.get('workers', 1))
+        
+        # Arrêt anticipé du test d'hypothèse ('sprt' ou 'hoeffding') dès que l'écart
+        # de log-vraisemblance entre les deux meilleurs candidats atteint le risque stop_error
+        self.early_stopping = params.get('early_stopping')
+        self.stop_error = params.get('stop_error', 1e-3)
+        
+        # Valeurs essayées par composante du test exhaustif : 0 à search_range - 1
+        # (None = tout Z_q)
+        self.search_range = params.get('search_range')
+        
+        # Poids de Hamming maximal d'un bloc réduit retenu par le test exhaustif
+        self.max_weight = params.get('max_weight', 2)
+        
+        # Recherche des candidats : 'exhaustive' ou 'pruned' (élimination par
+        # paquets croissants, au plus pruning_beam survivants par paquet)
+        self.candidate_search = params.get('candidate_search', 'exhaustive')
+        self.pruning_beam = params.get('pruning_beam')
+        
+        # Nombre d'échantillons réellement utilisés par bloc
+        self.samples_used = {}
+        
+        # Part des paires (candidat, échantillon) évitées par l'élagage, par bloc
+        self.pruning_rate = {}
+        
         # Pour le suivi des étapes
         self.step_details = []
     
     def solve(self, samples, true_secret=None):
         """Résout LWE avec BKW - Version détaillée"""
-        found_secret = [0] * self.n
-        original_samples = [s.copy() for s in samples]
-        
-        self.log("="*60, 'info')
-        self.log("🚀 DÉBUT DE LA RÉSOLUTION LWE AVEC BKW", 'info')
-        self.log(f"📊 Paramètres: n={self.n}, q={self.q}, σ={self.sigma}, a={self.a}, b={self.b}", 'info')
-        self.log(f"🔑 Secret à retrouver: {true_secret}", 'info')
-        self.log("="*60, 'info')
-        
-        for block in range(self.a, 0, -1):
-            self.log(f"\n{'='*50}", 'info')
-            self.log(f"🔷 BLOC {block}/{self.a} - Début du traitement", 'info')
-            self.log(f"📐 Bloc courant: positions {(block-1)*self.b} à {block*self.b}", 'info')
-            
-            # Phase 1: Réduction
-            self.log(f"\n📉 PHASE 1: Réduction d'échantillons", 'info')
-            self.log(f"Objectif: Annuler les blocs 1 à {block-1}", 'info')
-            
-            temp_samples = self.reduction_phase(original_samples, block)
-            
-            self.log(f"✅ Réduction terminée: {len(temp_samples)} échantillons réduits", 'success')
-            self.log(f"📊 Échantillons après réduction:", 'info')
-            for i, sample in enumerate(temp_samples[:3]):  # Montrer seulement 3 échantillons
-                v_str = ','.join(str(x) for x in sample['v'])
-                self.log(f"  Échantillon {i+1}: v=[{v_str}], c={sample['c']}", 'info')
-            if len(temp_samples) > 3:
-                self.log(f"  ... et {len(temp_samples)-3} autres", 'info')
-            
-            # Phase 2: Test d'hypothèse
-            self.log(f"\n🔍 PHASE 2: Test d'hypothèse", 'info')
-            self.log(f"Objectif: Trouver les {self.b} composantes du secret pour ce bloc", 'info')
-            
-            block_start = (block - 1) * self.b
-            block_end = block * self.b
-            
-            block_secret = self.hypothesis_testing(temp_samples, block, block_start, block_end)
-            
-            # Stocker le résultat
-            for i, val in enumerate(block_secret):
-                found_secret[block_start + i] = val
-            
-            # Vérifier la précision
-            if true_secret is not None:
-                correct = sum(1 for i in range(len(block_secret))
-                             if block_secret[i] == true_secret[block_start + i])
+        try:
+            found_secret = [0] * self.n
+            self.samples_used = {}
+            self.pruning_rate = {}
+            if hasattr(samples, 'arrays'):
+                # Fichier d'échantillons sur disque : V reste projeté en mémoire (type
+                # compact, lu par paquets), seules les étiquettes sont copiées
+                original_samples = (samples.V, np.asarray(samples.c, dtype=np.int64) % self.q)
+            else:
+                V, c = samples if isinstance(samples, tuple) else samples_to_arrays(samples)
+                # Copie de travail unique, mise à jour sur place par la substitution arrière
+                original_samples = (np.asarray(V, dtype=np.int64).reshape(-1, self.n) % self.q,
+                                    np.asarray(c, dtype=np.int64) % self.q)
                 
-                self.log(f"\n📊 RÉSULTAT DU BLOC {block}:", 'info')
-                self.log(f"  Secret trouvé: {block_secret}", 'info' if correct == self.b else 'warning')
-                self.log(f"  Secret réel:   {true_secret[block_start:block_end]}", 'info')
-                self.log(f"  Exactitude: {correct}/{self.b} composantes correctes", 
-                        'success' if correct >= self.b - 1 else 'warning')
+            cache = None
+            if self.use_cache:
+                cache = ReductionCache(*original_samples, self.q)
                 
-                # Expliquer les difficultés pour LWE
-                if correct < self.b:
-                    self.log(f"  ⚠️ Difficulté: LWE avec modulus q={self.q} est plus complexe que LPN", 'warning')
-                    self.log(f"  💡 Le bruit gaussien σ={self.sigma} s'accumule lors des réductions", 'info')
-                    self.log(f"  💡 La vraisemblance peut être moins discriminante avec grand q", 'info')
-            
-            # Phase 3: Substitution arrière
-            if block > 1:
-                self.log(f"\n↩️ PHASE 3: Substitution arrière", 'info')
-                self.log(f"Objectif: Éliminer la contribution des bits connus", 'info')
+            self.log("="*60, 'info')
+            self.log("🚀 DÉBUT DE LA RÉSOLUTION LWE AVEC BKW", 'info')
+            self.log(f"📊 Paramètres: n={self.n}, q={self.q}, σ={self.sigma}, a={self.a}, b={self.b}", 'info')
+            self.log(f"🔑 Secret à retrouver: {true_secret}", 'info')
+            self.log("="*60, 'info')
+                
+            for block in range(self.a, 0, -1):
+                self.log(f"\n{'='*50}", 'info')
+                self.log(f"🔷 BLOC {block}/{self.a} - Début du traitement", 'info')
+                self.log(f"📐 Bloc courant: positions {(block-1)*self.b} à {block*self.b}", 'info')
+                    
+                # Phase 1: Réduction
+                self.log(f"\n📉 PHASE 1: Réduction d'échantillons", 'info')
+                self.log(f"Objectif: Annuler les blocs 1 à {block-1}", 'info')
+                    
+                with self.log.phase(f"Réduction (bloc {block})"):
+                    if cache is not None:
+                        temp_samples = self.cached_reduction(cache, block)
+                    else:
+                        temp_samples = self.reduction_phase(original_samples, block)
+                    
+                reduced_V, reduced_c = temp_samples
+                self.log(f"✅ Réduction terminée: {len(reduced_c)} échantillons réduits", 'success')
+                if self.log.verbose:
+                    self.log.detail("📊 Échantillons après réduction:")
+                    for i in range(min(3, len(reduced_c))):  # Montrer seulement 3 échantillons
+                        v_str = ','.join(str(x) for x in reduced_V[i].tolist())
+                        self.log.detail("  Échantillon {}: v=[{}], c={}", i + 1, v_str, int(reduced_c[i]))
+                    if len(reduced_c) > 3:
+                        self.log.detail("  ... et {} autres", len(reduced_c) - 3)
+                    
+                # Phase 2: Test d'hypothèse
+                self.log(f"\n🔍 PHASE 2: Test d'hypothèse", 'info')
+                self.log(f"Objectif: Trouver les {self.b} composantes du secret pour ce bloc", 'info')
+                    
+                block_start = (block - 1) * self.b
+                block_end = block * self.b
+                    
+                with self.log.phase(f"Test d'hypothèse (bloc {block})"):
+                    block_secret = self.hypothesis_testing(temp_samples, block, block_start, block_end)
+                    
+                # Stocker le résultat
+                for i, val in enumerate(block_secret):
+                    found_secret[block_start + i] = val
+                    
+                # Vérifier la précision
+                if true_secret is not None:
+                    correct = sum(1 for i in range(len(block_secret))
+                                 if block_secret[i] == true_secret[block_start + i])
+                        
+                    self.log(f"\n📊 RÉSULTAT DU BLOC {block}:", 'info')
+                    self.log(f"  Secret trouvé: {block_secret}", 'info' if correct == self.b else 'warning')
+                    self.log(f"  Secret réel:   {true_secret[block_start:block_end]}", 'info')
+                    self.log(f"  Exactitude: {correct}/{self.b} composantes correctes", 
+                            'success' if correct >= self.b - 1 else 'warning')
+                        
+                    # Expliquer les difficultés pour LWE
+                    if correct < self.b:
+                        self.log(f"  ⚠️ Difficulté: LWE avec modulus q={self.q} est plus complexe que LPN", 'warning')
+                        self.log(f"  💡 Le bruit gaussien σ={self.sigma} s'accumule lors des réductions", 'info')
+                        self.log(f"  💡 La vraisemblance peut être moins discriminante avec grand q", 'info')
+                    
+                # Phase 3: Substitution arrière
+                if block > 1:
+                    self.log(f"\n↩️ PHASE 3: Substitution arrière", 'info')
+                    self.log(f"Objectif: Éliminer la contribution des bits connus", 'info')
+                        
+                    with self.log.phase(f"Substitution arrière (bloc {block})"):
+                        contributions = self.back_substitution(original_samples, found_secret,
+                                                               block_start, block_end)
+                        if cache is not None:
+                            # Mise à jour des étiquettes de tous les niveaux en cache
+                            cache.patch(-contributions)
+                    self.log(f"✅ Substitution terminée pour le bloc {block}", 'success')
+                
+            self.log(f"\n{'='*60}", 'info')
+            self.log("🏁 RÉSOLUTION TERMINÉE", 'info')
+            self.log(f"🔑 Secret final trouvé: {found_secret}", 'info')
                 
-                self.back_substitution(original_samples, found_secret, block_start, block_end)
-                self.log(f"✅ Substitution terminée pour le bloc {block}", 'success')
-        
-        self.log(f"\n{'='*60}", 'info')
-        self.log("🏁 RÉSOLUTION TERMINÉE", 'info')
-        self.log(f"🔑 Secret final trouvé: {found_secret}", 'info')
-        
-        if true_secret is not None:
-            correct_total = sum(1 for i in range(self.n) if found_secret[i] == true_secret[i])
-            accuracy = (correct_total / self.n) * 100
-            self.log(f"📈 Précision globale: {correct_total}/{self.n} ({accuracy:.1f}%)", 
-                    'success' if accuracy > 70 else 'warning')
+            if true_secret is not None:
+                correct_total = sum(1 for i in range(self.n) if found_secret[i] == true_secret[i])
+                accuracy = (correct_total / self.n) * 100
+                self.log(f"📈 Précision globale: {correct_total}/{self.n} ({accuracy:.1f}%)", 
+                        'success' if accuracy > 70 else 'warning')
+                    
+                # Explication finale sur les difficultés LWE
+                if accuracy < 80:
+                    self.log(f"\n💡 EXPLICATION DES DIFFICULTÉS LWE:", 'info')
+                    self.log(f"  • Le modulus q={self.q} crée un espace de recherche plus grand", 'info')
+                    self.log(f"  • Le bruit gaussien σ={self.sigma} s'accumule exponentiellement", 'info')
+                    self.log(f"  • La phase de test d'hypothèse doit explorer q^{self.b} possibilités", 'info')
+                    self.log(f"  • Pour améliorer: augmenter les échantillons ou réduire le bruit", 'info')
             
-            # Explication finale sur les difficultés LWE
-            if accuracy < 80:
-                self.log(f"\n💡 EXPLICATION DES DIFFICULTÉS LWE:", 'info')
-                self.log(f"  • Le modulus q={self.q} crée un espace de recherche plus grand", 'info')
-                self.log(f"  • Le bruit gaussien σ={self.sigma} s'accumule exponentiellement", 'info')
-                self.log(f"  • La phase de test d'hypothèse doit explorer q^{self.b} possibilités", 'info')
-                self.log(f"  • Pour améliorer: augmenter les échantillons ou réduire le bruit", 'info')
-        
-        return found_secret
+            return found_secret
+        
+        finally:
+            # Libérer les processus de la réduction répartie
+            self.sharding.close()
     
     def reduction_phase(self, samples, block_current):
-        """Phase de réduction avec affichage détaillé"""
-        temp_samples = [s.copy() for s in samples]
+        """Phase de réduction avec affichage détaillé
+        
+        samples: couple (V, c) de tableaux, ou liste de dictionnaires {'v', 'c'}.
+        Retourne les tableaux (V, c) réduits ; les tableaux d'entrée ne sont pas modifiés.
+        """
+        V, c = samples if isinstance(samples, tuple) else samples_to_arrays(samples)
         
         for step in range(1, block_current):
-            self.log(f"  Étape {step}/{block_current-1}: Réduction du bloc {step}", 'info')
-            
-            table = {}
-            new_samples = []
-            collisions = 0
+            self.log.detail("  Étape {}/{}: Réduction du bloc {}", step, block_current - 1, step)
+            V, c = self.reduction_step(V, c, step)
+        
+        return V, c
+    
+    def reduction_step(self, V, c, step):
+        """Une étape de réduction sur les tableaux (V, c) : collisions ± du bloc step"""
+        block_start = (step - 1) * self.b
+        block_end = step * self.b
+        
+        left, right, sign = self.reduction_pairs(V, step)
+        new_V = self.combine_rows(V, left, right, sign)
+        new_c = c[left] + sign * c[right]
+        
+        # Les lignes déjà nulles sur le bloc sont recopiées telles quelles
+        combined = sign != 0
+        new_c[combined] %= self.q
+        collisions = int(np.count_nonzero(combined))
+        
+        # Afficher quelques collisions
+        if self.log.verbose:
+            for number, row in enumerate(np.flatnonzero(combined)[:2], start=1):
+                i, j = left[row], right[row]
+                self.log.detail("    Collision #{}:", number)
+                self.log.detail("      v1={}, c1={}", V[i, block_start:block_end].tolist(), c[i])
+                self.log.detail("      v2={}, c2={}", V[j, block_start:block_end].tolist(), c[j])
+                self.log.detail("      → v_new={}, c_new={}",
+                                new_V[row, block_start:block_end].tolist(), new_c[row])
+        
+        self.log.detail("    Résultat: {} collisions, {} échantillons restants",
+                        collisions, len(new_c))
+        return new_V, new_c
+    
+    def reduction_pairs(self, V, step):
+        """Combinaisons de la réduction du bloc step : ligne = V[left] + sign·V[right] mod q
+        
+        Même parcours que le test de collisions échantillon par échantillon ;
+        sign = 0 recopie une ligne déjà nulle sur le bloc. Avec workers > 1,
+        les classes ± de clés sont réparties entre processus.
+        """
+        block, modulus = self.collision_keys(self.read_block(V, (step - 1) * self.b, step * self.b),
+                                             step)
+        
+        shards = self.sharding.map(signed_collision_pairs, block,
+                                   signed_class_hash(block, modulus), modulus)
+        if len(shards) == 1:
+            return shards[0][1]
+        
+        left = np.concatenate([rows[l] for rows, (l, r, sg) in shards])
+        right = np.concatenate([rows[r] for rows, (l, r, sg) in shards])
+        sign = np.concatenate([sg for rows, (l, r, sg) in shards])
+        
+        # Même ordre que le calcul en un seul processus (par ligne parcourue), sans tri
+        return merge_by_row(len(V), left, right, sign)
+    
+    def read_block(self, V, start, end):
+        """Colonnes V[:, start:end] mod q en int64, lues par paquets de REDUCTION_CHUNK lignes
+        
+        V peut être un fichier projeté en mémoire de type compact : seul le bloc
+        est matérialisé, jamais la matrice entière.
+        """
+        block = np.empty((len(V), end - start), dtype=np.int64)
+        for lo in range(0, len(V), REDUCTION_CHUNK):
+            block[lo:lo + REDUCTION_CHUNK] = np.asarray(V[lo:lo + REDUCTION_CHUNK, start:end]) % self.q
+        return block
+    
+    def combine_rows(self, V, left, right, sign):
+        """Lignes V[left] + sign·V[right] mod q, calculées par paquets de REDUCTION_CHUNK
+        
+        Le résultat garde le type de V (compact pour un fichier d'échantillons) ;
+        seul un paquet est converti en int64 à la fois.
+        """
+        combined = np.empty((len(left), V.shape[1]), dtype=V.dtype)
+        for lo in range(0, len(left), REDUCTION_CHUNK):
+            part = slice(lo, lo + REDUCTION_CHUNK)
+            rows = np.asarray(V[left[part]], dtype=np.int64)
+            rows += sign[part, None] * np.asarray(V[right[part]], dtype=np.int64)
+            combined[part] = rows % self.q
+        return combined
+    
+    def collision_keys(self, block, step):
+        """Clés comparées pour les collisions ± du bloc step et leur modulus (ici le bloc)"""
+        return block, self.q
+    
+    def cached_reduction(self, cache, block_current):
+        """Phase de réduction qui réutilise les niveaux déjà calculés pour les blocs précédents
+        
+        Retourne le niveau réduit sous forme de tableaux (V, c).
+        """
+        depth = block_current - 1
+        
+        for step in range(1, depth + 1):
+            if step <= cache.depth:
+                self.log.detail("  Étape {}/{}: niveau repris du cache ({} échantillons)",
+                                step, depth, len(cache.labels[step]))
+                continue
             
-            block_start = (step - 1) * self.b
-            block_end = step * self.b
+            self.log.detail("  Étape {}/{}: Réduction du bloc {}", step, depth, step)
             
-            for sample in temp_samples:
-                v_block = tuple(sample['v'][block_start:block_end])
-                
-                # Vérifier si déjà zéro
-                if all(x == 0 for x in v_block):
-                    new_samples.append(sample)
-                    continue
-                
-                # Chercher collision
-                if v_block in table:
-                    collisions += 1
-                    other = table.pop(v_block)
-                    new_v = mod_subtract(sample['v'], other['v'], self.q)
-                    new_c = (sample['c'] - other['c']) % self.q
-                    new_samples.append({'v': new_v, 'c': new_c})
-                    
-                    # Afficher quelques collisions
-                    if collisions <= 2:
-                        self.log(f"    Collision #{collisions}:", 'info')
-                        self.log(f"      v1={sample['v'][block_start:block_end]}, c1={sample['c']}", 'info')
-                        self.log(f"      v2={other['v'][block_start:block_end]}, c2={other['c']}", 'info')
-                        self.log(f"      → v_new={new_v[block_start:block_end]}, c_new={new_c}", 'info')
-                    
-                else:
-                    # Chercher opposé
-                    v_neg = tuple((-x) % self.q for x in v_block)
-                    if v_neg in table:
-                        collisions += 1
-                        other = table.pop(v_neg)
-                        new_v = mod_add(sample['v'], other['v'], self.q)
-                        new_c = (sample['c'] + other['c']) % self.q
-                        new_samples.append({'v': new_v, 'c': new_c})
-                    else:
-                        table[v_block] = sample
+            V, _ = cache.level(step - 1)
+            left, right, sign = self.reduction_pairs(V, step)
+            cache.push(self.combine_rows(V, left, right, sign), left, right, sign)
             
-            temp_samples = new_samples
-            self.log(f"    Résultat: {collisions} collisions, {len(temp_samples)} échantillons restants", 'info')
+            collisions = int(np.count_nonzero(sign))
+            self.log.detail("    Résultat: {} collisions, {} échantillons restants",
+                            collisions, len(left))
         
-        return temp_samples
+        return cache.level(depth)
     
     def hypothesis_testing(self, samples, block_current, start, end):
-        """Test d'hypothèse avec affichage détaillé"""
-        self.log(f"  Filtrage des échantillons (max {2} composantes non nulles)", 'info')
+        """Test d'hypothèse avec affichage détaillé
         
-        d = 2  # Nombre max de composantes non nulles
-        filtered = []
+        samples: couple (V, c) de tableaux, ou liste de dictionnaires {'v', 'c'}
+        """
+        if self.distinguisher == 'fft':
+            if self.q ** (end - start) <= FFT_MAX_CELLS:
+                return self.fft_hypothesis_testing(samples, block_current, start, end)
+            self.log(f"  ⚠️ q^b = {self.q ** (end - start)} trop grand pour la FFT, "
+                     f"retour au test exhaustif", 'warning')
         
-        for sample in samples:
-            v_block = sample['v'][start:end]
-            if hamming_weight(v_block) <= d:
-                filtered.append(sample)
+        d = self.max_weight  # Nombre max de composantes non nulles
+        self.log.detail("  Filtrage des échantillons (max {} composantes non nulles)", d)
         
-        self.log(f"  Échantillons après filtrage: {len(filtered)}/{len(samples)}", 'info')
+        V, c = samples if isinstance(samples, tuple) else samples_to_arrays(samples)
+        block = self.read_block(V, start, end)
         
-        # Partitionner par motif
-        partitions = {}
-        for sample in filtered:
-            v_block = sample['v'][start:end]
-            pattern = tuple(1 if x != 0 else 0 for x in v_block)
-            
-            if pattern not in partitions:
-                partitions[pattern] = []
-            partitions[pattern].append(sample)
+        filtered = np.flatnonzero(np.count_nonzero(block, axis=1) <= d)
+        
+        self.log.detail("  Échantillons après filtrage: {}/{}", len(filtered), len(c))
         
-        self.log(f"  {len(partitions)} motifs différents trouvés", 'info')
+        # Partitionner par motif (masque des positions non nulles), par première apparition
+        masks = (block[filtered] != 0) @ (1 << np.arange(end - start, dtype=np.int64))
+        _, first_seen, group_of = np.unique(masks, return_index=True, return_inverse=True)
+        group_of = group_of.reshape(-1)
+        
+        self.log.detail("  {} motifs différents trouvés", len(first_seen))
         
         # Tester chaque partition
         block_secret = [0] * self.b
         steps = block_current - 1
         sigma_total = self.sigma * np.sqrt(2 ** steps)
         
-        self.log(f"  Bruit accumulé: σ_total = {sigma_total:.3f} (σ_initial × √2^{steps})", 'info')
+        self.log.detail("  Bruit accumulé: σ_total = {:.3f} (σ_initial × √2^{})", sigma_total, steps)
+        used_total = 0
+        
+        # Scores précalculés : un accès indexé par paire (échantillon, candidat)
+        scores = log_likelihood_table(float(sigma_total), self.q)
+        search_range = self.search_range or self.q
         
-        for pattern, group in partitions.items():
+        patterns = []
+        for group in np.argsort(first_seen, kind='stable'):
+            rows = filtered[group_of == group]
+            pattern = tuple(int(x != 0) for x in block[rows[0]].tolist())
             non_zero_pos = [i for i, p in enumerate(pattern) if p == 1]
+            if non_zero_pos:
+                patterns.append((pattern, non_zero_pos, rows))
+        
+        # Motifs et tranches de candidats répartis entre processus (hors arrêt séquentiel)
+        parallel_ranking = None
+        cells = sum(search_range ** len(pos) * len(rows) for _, pos, rows in patterns)
+        scored_cells = 0
+        pruned = self.candidate_search == 'pruned'
+        if (self.sharding.workers > 1 and not self.early_stopping and not pruned
+                and cells >= MIN_PARALLEL_CELLS):
+            parallel_ranking = self.parallel_scoring(block, c % self.q, patterns, search_range,
+                                                     scores, cells)
+        
+        for index, (pattern, non_zero_pos, rows) in enumerate(patterns):
+            self.log.detail("  Traitement du motif {} ({} composantes non nulles)",
+                            pattern, len(non_zero_pos))
+            self.log.detail("    Positions non nulles: {}", non_zero_pos)
+            self.log.detail("    Nombre d'échantillons: {}", len(rows))
             
-            if not non_zero_pos:
-                continue
-            
-            self.log(f"  Traitement du motif {pattern} ({len(non_zero_pos)} composantes non nulles)", 'info')
-            self.log(f"    Positions non nulles: {non_zero_pos}", 'info')
-            self.log(f"    Nombre d'échantillons: {len(group)}", 'info')
-            
-            # Test exhaustif limité
-            best_score = -float('inf')
-            best_candidate = [0] * len(non_zero_pos)
-            
-            # Limiter la recherche pour l'affichage
-            search_range = min(self.q, 5)  # Réduit pour l'affichage
+            candidates = candidate_grid(len(non_zero_pos), search_range)
             
-            self.log(f"    Exploration des candidats (0 à {search_range-1}):", 'info')
+            self.log.detail("    Exploration des candidats (0 à {}):", search_range - 1)
             
-            for candidate in self.generate_candidates(len(non_zero_pos), search_range):
-                score = 0
+            if parallel_ranking is not None:
+                top, top_scores = parallel_ranking[index]
+                used = len(rows)
+            else:
+                # Composantes non nulles et étiquettes du groupe
+                group_V = block[rows][:, non_zero_pos]
+                group_c = c[rows] % self.q
                 
-                for sample in group:
-                    error = sample['c']
-                    for j, pos in enumerate(non_zero_pos):
-                        abs_pos = start + pos
-                        error = (error - sample['v'][abs_pos] * candidate[j]) % self.q
-                    
-                    # Normaliser erreur
-                    if error > self.q // 2:
-                        error -= self.q
-                    
-                    score += log_likelihood(error, sigma_total, self.q)
-                
-                # Afficher quelques scores
-                if np.random.random() < 0.1:  # Afficher 10% des candidats
-                    self.log(f"      Candidat {candidate}: score={score:.2f}", 'info')
-                
-                if score > best_score:
-                    best_score = score
-                    best_candidate = candidate[:]
+                if pruned:
+                    alive, totals, used, pattern_cells = self.pruned_scoring(
+                        group_V, group_c, candidates, scores)
+                    self.log.detail("    Élagage: {}/{} candidats restants après {}/{} échantillons",
+                                    len(alive), len(candidates), used, len(rows))
+                    order = top_indices(totals, 3)
+                    top, top_scores = alive[order], totals[order]
+                else:
+                    if self.early_stopping:
+                        totals, used = self.sequential_scoring(group_V, group_c, candidates, scores)
+                        self.log.detail("    Arrêt séquentiel après {}/{} échantillons",
+                                        used, len(rows))
+                    else:
+                        totals = self.candidate_scores(group_V, group_c, candidates, scores)
+                        used = len(rows)
+                    pattern_cells = used * len(candidates)
+                    top = top_indices(totals, 3)
+                    top_scores = totals[top]
+                scored_cells += pattern_cells
+            used_total += used
+            
+            # Afficher les meilleurs scores (le premier maximum l'emporte)
+            for candidate_index, score in zip(top.tolist(), top_scores.tolist()):
+                self.log.detail("      Candidat {}: score={:.2f}",
+                                candidates[candidate_index].tolist(), score)
             
-            self.log(f"    Meilleur candidat: {best_candidate} (score={best_score:.2f})", 'success')
+            best_candidate = candidates[top[0]].tolist()
+            self.log.detail("    Meilleur candidat: {} (score={:.2f})", best_candidate, top_scores[0],
+                            msg_type='success')
             
             # Assigner
             for j, pos in enumerate(non_zero_pos):
                 block_secret[pos] = best_candidate[j]
         
+        if self.early_stopping:
+            self.log(f"  ⏹️ Arrêt séquentiel: {used_total}/{len(filtered)} échantillons notés", 'info')
+        if pruned:
+            rate = 1 - scored_cells / cells if cells else 0.0
+            self.pruning_rate[block_current] = rate
+            self.log(f"  ✂️ Élagage: {rate:.1%} des {cells} paires (candidat, échantillon) évitées",
+                     'info')
+        self.samples_used[block_current] = used_total
+        return block_secret
+    
+    def candidate_scores(self, group_V, group_c, candidates, scores):
+        """Score de chaque candidat : Σ scores[(c - <v, s>) mod q] sur les échantillons"""
+        return likelihood_scores(group_V, group_c, candidates, scores, self.q)
+    
+    def pruned_scoring(self, group_V, group_c, candidates, scores):
+        """Recherche élaguée : notation sur des paquets d'échantillons de taille doublée
+        
+        Après chaque paquet, un candidat dont le retard sur le meilleur dépasse
+        log((K - 1) / stop_error) est éliminé : le rapport de vraisemblance rend
+        improbable qu'il le rattrape. Avec pruning_beam, seuls les meilleurs
+        survivants sont gardés. La notation s'arrête quand un seul reste.
+        Retourne (indices survivants, leurs scores, échantillons utilisés,
+        paires notées).
+        """
+        threshold = np.log(max(len(candidates) - 1, 1) / self.stop_error)
+        alive = np.arange(len(candidates))
+        totals = np.zeros(len(candidates), dtype=np.float64)
+        
+        used = cells = 0
+        batch = PRUNING_BATCH
+        while used < len(group_c) and len(alive) > 1:
+            part = slice(used, used + batch)
+            totals[alive] += self.candidate_scores(group_V[part], group_c[part],
+                                                   candidates[alive], scores)
+            cells += len(alive) * len(group_c[part])
+            used += len(group_c[part])
+            batch *= 2
+            
+            alive = alive[totals[alive] > totals[alive].max() - threshold]
+            if self.pruning_beam and len(alive) > self.pruning_beam:
+                alive = np.sort(alive[top_indices(totals[alive], self.pruning_beam)])
+        
+        return alive, totals[alive], used, cells
+    
+    def parallel_scoring(self, block, c, patterns, search_range, scores, cells):
+        """Test exhaustif de tous les motifs, découpés en tranches de candidats, en parallèle
+        
+        block et c sont placés une fois en mémoire partagée ; chaque tâche reçoit
+        les lignes de son motif et une tranche [lo, hi) de la grille des candidats,
+        et renvoie ses 3 meilleurs. Retourne, par motif, les 3 meilleurs globaux
+        (indices, scores), égalités départagées par indice comme en séquentiel.
+        """
+        # Environ 4 tâches par processus, sans descendre sous SCORING_CELLS paires
+        task_cells = max(SCORING_CELLS, cells // (4 * self.sharding.workers))
+        pool = self.sharding.executor()
+        
+        with SharedArrays(block=block, c=c) as shared:
+            futures = []
+            for pattern, non_zero_pos, rows in patterns:
+                total = search_range ** len(non_zero_pos)
+                step = max(1, task_cells // len(rows))
+                futures.append([pool.submit(score_candidate_slice, shared.spec, rows,
+                                            non_zero_pos, lo, min(lo + step, total),
+                                            search_range, scores, self.q)
+                                for lo in range(0, total, step)])
+            
+            ranking = []
+            for slices in futures:
+                results = [future.result() for future in slices]
+                top = np.concatenate([indices for indices, _ in results])
+                top_scores = np.concatenate([values for _, values in results])
+                order = np.lexsort((top, -top_scores))[:3]
+                ranking.append((top[order], top_scores[order]))
+        
+        return ranking
+    
+    def sequential_scoring(self, group_V, group_c, candidates, scores):
+        """Notation des candidats par paquets d'échantillons, arrêtée au premier écart décisif
+        
+        Les scores sont des log-vraisemblances : l'écart entre le meilleur candidat
+        et le second est le rapport de vraisemblance du SPRT. On s'arrête quand il
+        dépasse log((K - 1) / stop_error) pour K candidats.
+        Retourne (scores des candidats, échantillons utilisés).
+        """
+        totals = np.zeros(len(candidates), dtype=np.float64)
+        threshold = np.log(max(len(candidates) - 1, 1) / self.stop_error)
+        
+        used = 0
+        for lo in range(0, len(group_c), SEQUENTIAL_BATCH):
+            batch = slice(lo, lo + SEQUENTIAL_BATCH)
+            totals += self.candidate_scores(group_V[batch], group_c[batch], candidates, scores)
+            used += len(group_c[batch])
+            
+            if len(candidates) > 1:
+                second, best = np.partition(totals, -2)[-2:]
+                if best - second >= threshold:
+                    break
+        
+        return totals, used
+    
+    def fft_hypothesis_testing(self, samples, block_current, start, end):
+        """Distingueur FFT : note les q^b candidats du bloc en une seule transformée
+        
+        f[a] = Σ ω^c sur les échantillons de bloc a (ω = e^{2iπ/q}), puis
+        f̂[s] = Σ ω^(c - <a, s>) = Σ ω^e : le vrai secret maximise Re f̂[s].
+        samples: couple (V, c) de tableaux, ou liste de dictionnaires {'v', 'c'}
+        """
+        block_size = end - start
+        n_cells = self.q ** block_size
+        
+        self.log.detail("  Distingueur FFT sur Z_{}^{} ({} candidats)", self.q, block_size, n_cells)
+        
+        V, c = samples if isinstance(samples, tuple) else samples_to_arrays(samples)
+        if len(c) == 0:
+            self.log(f"  ⚠️ Aucun échantillon pour la FFT", 'warning')
+            return [0] * block_size
+        
+        keys = encode_blocks(self.read_block(V, start, end), 0, end - start, self.q)
+        
+        # Fonction sur Z_q^b (chiffre i de la clé = position start + i)
+        angles = 2 * np.pi * (c % self.q) / self.q
+        f = (np.bincount(keys, weights=np.cos(angles), minlength=n_cells)
+             + 1j * np.bincount(keys, weights=np.sin(angles), minlength=n_cells))
+        
+        spectrum = np.fft.fftn(f.reshape((self.q,) * block_size)).real.ravel()
+        
+        best = int(np.argmax(spectrum))
+        best_score = spectrum[best]
+        runner_up = np.partition(spectrum, -2)[-2] if n_cells > 1 else best_score
+        
+        block_secret = [(best // self.q ** i) % self.q for i in range(block_size)]
+        
+        self.log.detail("    {} échantillons utilisés", len(c))
+        self.samples_used[block_current] = len(c)
+        self.log.detail("    Meilleur candidat: {} (score={:.2f}, écart au second={:.2f})",
+                        block_secret, best_score, best_score - runner_up, msg_type='success')
+        
         return block_secret
     
     def generate_candidates(self, dim, max_val):
         """Génère tous les candidats possibles"""
-        if dim == 0:
-            yield []
-            return
-        
-        for val in range(max_val):
-            for rest in self.generate_candidates(dim - 1, max_val):
-                yield [val] + rest
+        yield from candidate_grid(dim, max_val).tolist()
     
     def back_substitution(self, samples, secret, start, end):
-        """Substitution arrière avec affichage"""
-        updates = 0
-        for sample in samples:
-            contribution = 0
-            for i in range(start, end):
-                contribution = (contribution + sample['v'][i] * secret[i]) % self.q
-            old_c = sample['c']
-            sample['c'] = (sample['c'] - contribution) % self.q
-            
-            # Afficher quelques mises à jour
-            if updates < 2 and old_c != sample['c']:
-                self.log(f"    Mise à jour échantillon: c={old_c} → {sample['c']}", 'info')
-                self.log(f"      Contribution éliminée: {contribution}", 'info')
-                updates += 1
\ No newline at end of file
+        """Substitution arrière vectorisée : c -= V[:, start:end] @ s[start:end] mod q
+        
+        samples: couple (V, c) de tableaux, c étant mis à jour sur place (tableau
+        partagé ou numpy.memmap accepté), ou liste de dictionnaires {'v', 'c'}.
+        Retourne les contributions retirées, pour mettre à jour un cache de réduction.
+        """
+        if not isinstance(samples, tuple):
+            V, c = samples_to_arrays(samples)
+            contributions = self.back_substitution((V, c), secret, start, end)
+            for sample, ci in zip(samples, c.tolist()):
+                sample['c'] = ci
+            return contributions
+        
+        V, c = samples
+        block_secret = np.asarray(secret[start:end], dtype=np.int64)
+        contributions = np.empty(len(c), dtype=np.int64)
+        
+        # Par paquets : mémoire bornée sur un fichier projeté en mémoire
+        for lo in range(0, len(c), BACK_SUBSTITUTION_CHUNK):
+            hi = lo + BACK_SUBSTITUTION_CHUNK
+            contributions[lo:hi] = (np.asarray(V[lo:hi, start:end], dtype=np.int64)
+                                    @ block_secret) % self.q
+            c[lo:hi] = (c[lo:hi] - contributions[lo:hi]) % self.q
+        
+        # Afficher quelques mises à jour
+        if self.log.verbose:
+            for index in np.flatnonzero(contributions)[:2]:
+                self.log.detail("    Mise à jour échantillon: c={} → {}",
+                                (int(c[index]) + contributions[index]) % self.q, int(c[index]))
+                self.log.detail("      Contribution éliminée: {}", contributions[index])
+        
+        return contributions
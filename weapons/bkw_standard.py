@@ -1,22 +1,58 @@
 # bkw_standard.py - Version corrigée
 import numpy as np
-from core.utils import xor_vectors, hamming_weight, majority_vote
+from core.utils import (xor_vectors, hamming_weight, majority_vote, sequential_step,
+                        group_pairs, all_pairs)
+from core.packed import PackedLPNSamples, pack_bits, popcount, WORD_BITS
+from core.reduction import ReductionCache
+from core.logger import WeaponLogger
+from core.parallel import ShardedReduction, merge_groups
+
+# Lignes lues à la fois par le vote séquentiel (arrêt anticipé)
+SEQUENTIAL_BATCH = 1 << 12
 
 class BKWStandard:
     """Algorithme BKW Standard pour LPN - Version corrigée"""
     
     def __init__(self, params, log_callback=None):
         self.params = params
-        self.log = log_callback or print
+        # Journal à niveaux : 'quiet', 'summary', 'verbose' (défaut) ou 'debug'
+        self.log = WeaponLogger.wrap(log_callback, params.get('log_level', 'verbose'))
         self.a = params['a']
         self.b = params['b']
         self.k = params.get('k', 0)
+        
+        # Conserver les niveaux de réduction d'un bloc à l'autre
+        self.use_cache = params.get('reduction_cache', True)
+        
+        # Combinaison dans un seau : 'representative' (XOR avec le premier) ou
+        # 'lf2' (toutes les paires, au plus lf2_cap par seau et lf2_max_samples au total)
+        self.combination = params.get('combination', 'representative')
+        self.lf2_cap = params.get('lf2_cap')
+        self.lf2_max_samples = params.get('lf2_max_samples', 1 << 20)
+        
+        # Réduction répartie par classes de clés sur workers processus
+        self.sharding = ShardedReduction(params.get('workers', 1))
+        
+        # Arrêt anticipé des votes : None, 'sprt' (τ connu) ou 'hoeffding',
+        # au risque d'erreur stop_error par position
+        self.early_stopping = params.get('early_stopping')
+        self.stop_error = params.get('stop_error', 1e-3)
+        # Ordre de lecture des votes : permutation aléatoire (graine vote_seed, ou
+        # celle de l'instance), pour ne pas lire à la suite les lignes d'un même seau
+        self.vote_seed = params.get('vote_seed', params.get('seed', 0))
+        
+        # Nombre d'échantillons réellement utilisés par bloc
+        self.samples_used = {}
     
     def solve(self, samples, true_secret=None):
         """Résout LPN avec BKW standard - RETOURNE TOUJOURS UN SECRET"""
         try:
             found_secret = [0] * self.k
-            original_samples = [s.copy() for s in samples]
+            self.samples_used = {}
+            original_samples = PackedLPNSamples.from_samples(samples, self.k)
+            cache = None
+            if self.use_cache:
+                cache = ReductionCache(original_samples.words, original_samples.labels, 2)
             
             self.log("="*60, 'info')
             self.log("🚀 DÉBUT DE LA RÉSOLUTION LPN AVEC BKW STANDARD", 'info')
@@ -34,15 +70,8 @@ class BKWStandard:
                 # Phase 1: Réduction
                 self.log(f"\n📉 PHASE 1: Réduction pour les blocs 1 à {block-1}", 'info')
                 
-                temp_samples = [s.copy() for s in original_samples]
-                
-                for step in range(1, block):
-                    self.log(f"  Étape {step}: Réduction du bloc {step}", 'info')
-                    temp_samples = self.reduce_block(temp_samples, step)
-                    if not temp_samples:
-                        self.log(f"  ⚠️ Plus d'échantillons après réduction!", 'warning')
-                        break
-                    self.log(f"    Résultat: {len(temp_samples)} échantillons", 'info')
+                with self.log.phase(f"Réduction (bloc {block})"):
+                    temp_samples = self.reduce_for_block(original_samples, cache, block)
                 
                 if not temp_samples:
                     self.log(f"  ❌ Impossible de continuer - pas d'échantillons", 'error')
@@ -54,7 +83,8 @@ class BKWStandard:
                 block_start = (block - 1) * self.b
                 block_end = block * self.b
                 
-                block_secret = self.solve_block(temp_samples, block_start, block_end)
+                with self.log.phase(f"Résolution (bloc {block})"):
+                    block_secret = self.solve_block(temp_samples, block_start, block_end)
                 
                 if block_secret is None:
                     self.log(f"  ❌ Impossible de résoudre le bloc {block}", 'error')
@@ -65,21 +95,17 @@ class BKWStandard:
                     found_secret[block_start + i] = val
                 
                 # Vérifier la précision
-                if true_secret is not None:
-                    correct = sum(1 for i in range(len(block_secret)) 
-                                 if block_secret[i] == true_secret[block_start + i])
-                    
-                    self.log(f"\n📊 RÉSULTAT DU BLOC {block}:", 'info')
-                    self.log(f"  Secret trouvé: {''.join(map(str, block_secret))}", 
-                            'success' if correct == self.b else 'info')
-                    self.log(f"  Secret réel:   {''.join(map(str, true_secret[block_start:block_end]))}", 'info')
-                    self.log(f"  Exactitude: {correct}/{self.b} bits corrects", 
-                            'success' if correct == self.b else 'warning')
+                self.report_block(block, block_secret, true_secret)
                 
                 # Phase 3: Substitution arrière
                 if block > 1:
                     self.log(f"\n↩️ PHASE 3: Substitution arrière", 'info')
-                    self.back_substitution(original_samples, found_secret, block_start, block_end)
+                    with self.log.phase(f"Substitution arrière (bloc {block})"):
+                        contribution = self.back_substitution(original_samples, found_secret,
+                                                              block_start, block_end)
+                        if cache is not None:
+                            # Mise à jour des étiquettes de tous les niveaux en cache
+                            cache.patch(contribution)
                     self.log(f"✅ Substitution terminée", 'success')
             
             self.log(f"\n{'='*60}", 'info')
@@ -100,16 +126,57 @@ class BKWStandard:
             self.log(f"❌ Erreur dans solve(): {str(e)}", 'error')
             # Retourner un secret par défaut plutôt que None
             return [0] * self.k
+        
+        finally:
+            # Libérer les processus de la réduction répartie
+            self.sharding.close()
+    
+    def report_block(self, block, block_secret, true_secret):
+        """Affiche le secret trouvé pour un bloc face au secret réel (s'il est connu)"""
+        if true_secret is None:
+            return
+        block_start = (block - 1) * self.b
+        block_end = block * self.b
+        correct = sum(1 for i in range(len(block_secret)) 
+                     if block_secret[i] == true_secret[block_start + i])
+        
+        self.log(f"\n📊 RÉSULTAT DU BLOC {block}:", 'info')
+        self.log(f"  Secret trouvé: {''.join(map(str, block_secret))}", 
+                'success' if correct == self.b else 'info')
+        self.log(f"  Secret réel:   {''.join(map(str, true_secret[block_start:block_end]))}", 'info')
+        self.log(f"  Exactitude: {correct}/{self.b} bits corrects", 
+                'success' if correct == self.b else 'warning')
+    
+    def reduce_for_block(self, original_samples, cache, block):
+        """Échantillons réduits sur les blocs 1 à block-1 (depuis le cache s'il existe)"""
+        if cache is not None:
+            return self.cached_reduction(cache, block - 1)
+        
+        # La réduction produit de nouveaux tableaux : pas de copie nécessaire
+        temp_samples = original_samples
+        
+        for step in range(1, block):
+            self.log.detail("  Étape {}: Réduction du bloc {}", step, step)
+            temp_samples = self.reduce_block(temp_samples, step)
+            if not temp_samples:
+                self.log(f"  ⚠️ Plus d'échantillons après réduction!", 'warning')
+                break
+            self.log.detail("    Résultat: {} échantillons", len(temp_samples))
+        
+        return temp_samples
     
     def reduce_block(self, samples, step):
         """Réduit un bloc par regroupement et XOR - Version robuste"""
+        if isinstance(samples, PackedLPNSamples):
+            return self.reduce_block_packed(samples, step)
+        
         if not samples:
             return []
             
         block_start = (step - 1) * self.b
         block_end = step * self.b
         
-        self.log(f"    Regroupement par bits {block_start}-{block_end-1}", 'info')
+        self.log.detail("    Regroupement par bits {}-{}", block_start, block_end - 1)
         
         groups = {}
         for sample in samples:
@@ -122,7 +189,7 @@ class BKWStandard:
                 groups[key] = []
             groups[key].append(sample)
         
-        self.log(f"    {len(groups)} groupes formés", 'info')
+        self.log.detail("    {} groupes formés", len(groups))
         
         # XOR dans chaque groupe
         reduced = []
@@ -132,8 +199,10 @@ class BKWStandard:
             if len(group) < 2:
                 continue
             
-            key_str = ''.join(str(x) for x in key)
-            self.log(f"    Groupe '{key_str}': {len(group)} échantillons", 'info')
+            if self.log.verbose:
+                key_str = ''.join(str(x) for x in key)
+                self.log.detail("    Groupe '{}': {} échantillons", key_str, len(group),
+                                key='group')
             
             # Prendre un représentant
             repr_sample = group[0]
@@ -145,11 +214,14 @@ class BKWStandard:
                 reduced.append({'v': new_v, 'c': new_c})
                 total_xor += 1
         
-        self.log(f"    Total: {total_xor} opérations XOR", 'info')
+        self.log.detail("    Total: {} opérations XOR", total_xor)
         return reduced if reduced else []
     
     def solve_block(self, samples, start, end):
         """Résout un bloc par vote majoritaire - Version robuste"""
+        if isinstance(samples, PackedLPNSamples):
+            return self.solve_block_packed(samples, start, end)
+        
         if not samples:
             self.log(f"  ⚠️ Aucun échantillon pour la résolution", 'warning')
             return [0] * (end - start)
@@ -157,7 +229,7 @@ class BKWStandard:
         block_size = end - start
         votes = [[] for _ in range(block_size)]
         
-        self.log(f"  Filtrage des échantillons de poids de Hamming 1", 'info')
+        self.log.detail("  Filtrage des échantillons de poids de Hamming 1")
         
         # Filtrer échantillons de poids 1
         valid_samples = 0
@@ -170,7 +242,7 @@ class BKWStandard:
                 votes[pos].append(sample['c'])
                 valid_samples += 1
         
-        self.log(f"  {valid_samples} échantillons valides trouvés", 'info')
+        self.log.detail("  {} échantillons valides trouvés", valid_samples)
         
         # Si aucun échantillon valide, essayer autre chose
         if valid_samples == 0:
@@ -187,7 +259,7 @@ class BKWStandard:
             # Compter combien de votes par position
             for pos in range(block_size):
                 if votes[pos]:
-                    self.log(f"    Position {pos}: {len(votes[pos])} votes", 'info')
+                    self.log.detail("    Position {}: {} votes", pos, len(votes[pos]))
         
         # Vote majoritaire
         block_secret = []
@@ -196,32 +268,260 @@ class BKWStandard:
                 try:
                     majority = majority_vote(pos_votes)
                     block_secret.append(majority)
-                    ones = pos_votes.count(1)
-                    zeros = pos_votes.count(0)
-                    self.log(f"    Position {pos}: majorité = {majority} (1:{ones}, 0:{zeros})", 
-                            'success' if len(pos_votes) > 0 else 'info')
+                    if self.log.verbose:
+                        self.log.detail("    Position {}: majorité = {} (1:{}, 0:{})", pos, majority,
+                                        pos_votes.count(1), pos_votes.count(0), msg_type='success')
                 except:
                     block_secret.append(0)
-                    self.log(f"    Position {pos}: erreur de vote → 0 par défaut", 'warning')
+                    self.log.detail("    Position {}: erreur de vote → 0 par défaut", pos,
+                                    msg_type='warning')
             else:
                 block_secret.append(0)
-                self.log(f"    Position {pos}: aucun vote → 0 par défaut", 'warning')
+                self.log.detail("    Position {}: aucun vote → 0 par défaut", pos, msg_type='warning')
         
         return block_secret
     
     def back_substitution(self, samples, secret, start, end):
-        """Met à jour les échantillons avec le secret partiel"""
+        """Met à jour les échantillons avec le secret partiel : c ⊕= <v[start:end], s[start:end]>"""
+        if isinstance(samples, PackedLPNSamples):
+            return self.back_substitution_packed(samples, secret, start, end)
+        
+        if not samples:
+            return np.zeros(0, dtype=np.uint8)
+        
+        # Produit matrice-vecteur mod 2 sur le bloc, puis écriture dans chaque échantillon
+        V_block = np.array([sample['v'][start:end] for sample in samples], dtype=np.int64)
+        contribution = (V_block @ np.asarray(secret[start:end], dtype=np.int64)) & 1
+        
         updates = 0
-        for sample in samples:
+        for sample, bit in zip(samples, contribution.tolist()):
             old_c = sample['c']
-            contribution = 0
-            for i in range(start, end):
-                contribution ^= (sample['v'][i] & secret[i])
-            sample['c'] ^= contribution
+            sample['c'] ^= bit
             
             # Afficher quelques mises à jour
-            if updates < 2 and old_c != sample['c']:
+            if updates < 2 and bit and self.log.verbose:
                 v_str = ''.join(str(x) for x in sample['v'])
-                self.log(f"    Mise à jour: v={v_str}", 'info')
-                self.log(f"      c={old_c} ⊕ {contribution} = {sample['c']}", 'info')
-                updates += 1
\ No newline at end of file
+                self.log.detail("    Mise à jour: v={}", v_str)
+                self.log.detail("      c={} ⊕ {} = {}", old_c, bit, sample['c'])
+                updates += 1
+        
+        return contribution.astype(np.uint8)
+    
+    def reduction_pairs(self, samples, step):
+        """Paires (membre, représentant) de la réduction du bloc step (échantillons compactés)
+        
+        En mode LF2, toutes les paires de chaque seau (dans la limite des bornes).
+        """
+        block_start = (step - 1) * self.b
+        block_end = step * self.b
+        
+        if len(samples) == 0 or samples.k <= block_end:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        
+        self.log.detail("    Regroupement par bits {}-{}", block_start, block_end - 1)
+        
+        # Groupement par tri des clés entières
+        keys = samples.block_keys(block_start, block_end)
+        
+        if self.combination == 'lf2':
+            members, others = all_pairs(keys, self.lf2_cap, self.lf2_max_samples, self.b)
+            self.log.detail("    Mode LF2: {} paires formées", len(members))
+            return members, others
+        
+        shards = self.sharding.map(group_pairs, keys, keys, self.b)
+        if len(shards) == 1:
+            members, representatives = shards[0][1]
+        else:
+            # Même ordre que le calcul en un seul processus, sans nouveau tri
+            members, representatives = merge_groups(shards, len(keys))
+        
+        self.log.detail("    {} groupes formés", len(keys) - len(members))
+        return members, representatives
+    
+    def reduce_block_packed(self, samples, step):
+        """Réduction d'un bloc sur échantillons compactés (XOR par mots de 64 bits)"""
+        members, representatives = self.reduction_pairs(samples, step)
+        
+        # XOR vectorisé de chaque membre avec son représentant
+        reduced = samples.xor_rows(members, representatives)
+        
+        self.log.detail("    Total: {} opérations XOR", len(reduced))
+        return reduced
+    
+    def cached_reduction(self, cache, depth):
+        """Échantillons réduits au niveau depth, en réutilisant les niveaux déjà calculés"""
+        for step in range(1, depth + 1):
+            if step <= cache.depth:
+                self.log.detail("  Étape {}: niveau repris du cache ({} échantillons)",
+                                step, len(cache.labels[step]))
+                continue
+            
+            self.log.detail("  Étape {}: Réduction du bloc {}", step, step)
+            words, labels = cache.level(step - 1)
+            members, representatives = self.reduction_pairs(
+                PackedLPNSamples(words, labels, self.k), step)
+            cache.push(words[members] ^ words[representatives], members, representatives)
+            
+            self.log.detail("    Total: {} opérations XOR", len(members))
+            if len(members) == 0:
+                self.log(f"  ⚠️ Plus d'échantillons après réduction!", 'warning')
+                break
+            self.log.detail("    Résultat: {} échantillons", len(members))
+        
+        words, labels = cache.level(min(depth, cache.depth))
+        if cache.depth < depth:
+            return PackedLPNSamples(words[:0], labels[:0], self.k)
+        return PackedLPNSamples(words, labels, self.k)
+    
+    def solve_block_packed(self, samples, start, end):
+        """Vote majoritaire sur échantillons compactés"""
+        block_size = end - start
+        if len(samples) == 0:
+            self.log(f"  ⚠️ Aucun échantillon pour la résolution", 'warning')
+            return [0] * block_size
+        
+        if self.early_stopping:
+            block_secret = self.sequential_solve_block(samples, start, end)
+            if block_secret is not None:
+                return block_secret
+        
+        self.log.detail("  Filtrage des échantillons de poids de Hamming 1")
+        
+        keys = samples.block_keys(start, end)
+        labels = samples.labels.astype(np.int64)
+        single = samples.block_weights(start, end) == 1
+        valid_samples = int(single.sum())
+        
+        self.log.detail("  {} échantillons valides trouvés", valid_samples)
+        self.samples_used[start // self.b + 1] = len(samples)
+        
+        if valid_samples > 0:
+            # Position du bit à 1 : poids de Hamming de (2^pos - 1)
+            positions = popcount(keys[single] - np.uint64(1))
+            totals = np.bincount(positions, minlength=block_size)
+            ones = np.bincount(positions, weights=labels[single], minlength=block_size)
+        else:
+            self.log(f"  ⚠️ Aucun échantillon de poids 1", 'warning')
+            self.log(f"  🔍 Utilisation de tous les échantillons pour le vote...", 'info')
+            
+            bits = (keys[:, None] >> np.arange(block_size, dtype=np.uint64)) & np.uint64(1)
+            bits = bits.astype(np.int64)
+            totals = bits.sum(axis=0)
+            ones = (bits * labels[:, None]).sum(axis=0)
+            
+            for pos in range(block_size):
+                if totals[pos]:
+                    self.log.detail("    Position {}: {} votes", pos, int(totals[pos]))
+        
+        # Vote majoritaire (égalité → 0, comme majority_vote)
+        block_secret = []
+        for pos in range(block_size):
+            total = int(totals[pos])
+            if total == 0:
+                block_secret.append(0)
+                self.log.detail("    Position {}: aucun vote → 0 par défaut", pos, msg_type='warning')
+                continue
+            
+            count_ones = int(ones[pos])
+            count_zeros = total - count_ones
+            majority = 1 if count_ones > count_zeros else 0
+            block_secret.append(majority)
+            self.log.detail("    Position {}: majorité = {} (1:{}, 0:{})", pos, majority,
+                            count_ones, count_zeros, msg_type='success')
+        
+        return block_secret
+    
+    def reduced_error_rate(self, steps):
+        """Taux d'erreur après steps étapes : (1 - (1 - 2τ)^(2^steps)) / 2 (None si τ inconnu)"""
+        tau = self.params.get('tau')
+        if tau is None:
+            return None
+        return (1 - (1 - 2 * tau) ** (2 ** steps)) / 2
+    
+    def sequential_solve_block(self, samples, start, end):
+        """Votes séquentiels par position, arrêtés dès que le risque stop_error est atteint
+        
+        Les votes (échantillons de poids 1 sur le bloc) sont extraits par paquets de
+        SEQUENTIAL_BATCH lignes dans un ordre aléatoire : après la réduction, les
+        lignes sont rangées par représentant, et des votes consécutifs partageant
+        le bruit d'un même représentant fausseraient le risque du SPRT. Les paquets
+        qui suivent la dernière décision ne sont pas lus. Retourne None s'il n'y a
+        aucun vote.
+        """
+        block_size = end - start
+        error_rate = None
+        if self.early_stopping == 'sprt':
+            error_rate = self.reduced_error_rate(start // self.b)
+            if error_rate is None:
+                self.log.detail("  τ inconnu : borne de Hoeffding à la place du SPRT",
+                                msg_type='warning')
+        
+        margins = [0] * block_size
+        counts = [0] * block_size
+        decided = [False] * block_size
+        last_rows = [-1] * block_size
+        
+        order = np.random.default_rng(self.vote_seed).permutation(len(samples))
+        for lo in range(0, len(samples), SEQUENTIAL_BATCH):
+            batch = samples.take(order[lo:lo + SEQUENTIAL_BATCH])
+            single = np.flatnonzero(batch.block_weights(start, end) == 1)
+            positions = popcount(batch.block_keys(start, end)[single] - np.uint64(1))
+            votes = batch.labels[single]
+            
+            for pos in range(block_size):
+                at = np.flatnonzero(positions == pos)
+                if decided[pos] or len(at) == 0:
+                    continue
+                margins[pos], counts[pos], used, decided[pos] = sequential_step(
+                    votes[at], self.stop_error, error_rate, margins[pos], counts[pos])
+                last_rows[pos] = lo + int(single[at[used - 1]])
+            
+            if all(decided):
+                break
+        
+        if not any(counts):
+            return None
+        
+        block_secret = []
+        for pos in range(block_size):
+            bit = int(margins[pos] > 0)
+            block_secret.append(bit)
+            if counts[pos] == 0:
+                self.log.detail("    Position {}: aucun vote → 0 par défaut", pos, msg_type='warning')
+                continue
+            self.log.detail("    Position {}: {} après {} votes{}", pos, bit, counts[pos],
+                            '' if decided[pos] else ' (tous lus)', msg_type='success')
+        
+        # Échantillons lus jusqu'à la dernière décision
+        last_row = max(last_rows)
+        self.samples_used[start // self.b + 1] = last_row + 1
+        self.log(f"  ⏹️ Arrêt séquentiel: {last_row + 1}/{len(samples)} échantillons utilisés", 'info')
+        return block_secret
+    
+    def back_substitution_packed(self, samples, secret, start, end):
+        """Substitution arrière par mots : c ⊕= <v[start:end], s[start:end]>
+        
+        Retourne le vecteur des contributions, pour mettre à jour un cache de réduction.
+        """
+        if end - start <= WORD_BITS:
+            # Bloc d'au plus 64 bits : parité de (clé du bloc & clé du secret)
+            secret_key = sum(int(secret[start + i]) << i for i in range(end - start))
+            weights = popcount(samples.block_keys(start, end) & np.uint64(secret_key))
+            contribution = (weights & 1).astype(np.uint8)
+        else:
+            secret_bits = np.zeros(samples.k, dtype=np.uint8)
+            secret_bits[start:end] = secret[start:end]
+            contribution = samples.inner_products(pack_bits(secret_bits, samples.k))
+        
+        # Mise à jour sur place (étiquettes éventuellement partagées)
+        samples.labels ^= contribution
+        
+        # Afficher quelques mises à jour
+        if self.log.verbose:
+            for index in np.flatnonzero(contribution)[:2]:
+                v_str = ''.join(str(x) for x in samples.take([index]).to_arrays()[0][0])
+                self.log.detail("    Mise à jour: v={}", v_str)
+                self.log.detail("      c={} ⊕ 1 = {}", samples.labels[index] ^ 1, samples.labels[index])
+        
+        return contribution
@@ -1,66 +1,37 @@
 import numpy as np
 from weapons.bkw_lwe import BKWLWE
+from core.codes import LinearCode
 
 class CodedBKW(BKWLWE):
     """CODED-BKW: Utilise des codes linéaires"""
     
     def __init__(self, params, log_callback=None):
         super().__init__(params, log_callback)
-        self.t1 = 1  # Étapes BKW standard
-        self.t2 = 1  # Étapes codées
+        self.t1 = params.get('coded_t1', 1)  # Étapes BKW standard
+        self.t2 = params.get('coded_t2', 1)  # Étapes codées
+        
+        # Code [b, k] des étapes codées : 'repetition', 'parity', 'random'
+        # (dimension code_dimension), 'identity' ou matrice génératrice
+        self.code = LinearCode.from_params(params.get('code', 'repetition'), self.b, self.q,
+                                           params.get('code_dimension'), params.get('code_seed', 0))
         self.log("📡 Mode CODED-BKW: codes linéaires activés", 'info')
+        self.log(f"📡 Étapes {self.t1 + 1} à {self.t1 + self.t2}: {self.code}", 'info')
     
-    def reduction_phase(self, samples, block_current):
-        """Réduction avec codes linéaires"""
-        # Étapes BKW standard
-        temp = samples
-        for step in range(1, self.t1 + 1):
-            if step < block_current:
-                temp = super().reduction_phase(temp, step + 1)
-        
-        # Étapes codées
-        for step in range(self.t1 + 1, self.t1 + self.t2 + 1):
-            if step < block_current:
-                temp = self.coded_reduction_step(temp, step)
-        
-        return temp
+    def is_coded(self, step):
+        """Vrai pour les étapes réduites par le code (les t2 qui suivent les t1 standard)"""
+        return self.t1 < step <= self.t1 + self.t2
     
-    def coded_reduction_step(self, samples, step):
-        """Une étape de réduction codée"""
-        n_i = self.b + 1  # Réduire plus de positions
-        
-        # Code linéaire simple (répétition)
-        table = {}
-        new_samples = []
-        
-        block_start = (step - 1) * self.b
-        block_end = min(block_start + n_i, self.n)
-        
-        for sample in samples:
-            v_block = sample['v'][block_start:block_end]
-            
-            # Mapper au mot de code le plus proche
-            codeword = self.find_nearest_codeword(v_block)
-            key = tuple(codeword)
-            
-            if key in table:
-                other = table.pop(key)
-                new_v = [(sample['v'][i] - other['v'][i]) % self.q 
-                        for i in range(len(sample['v']))]
-                new_c = (sample['c'] - other['c']) % self.q
-                new_samples.append({'v': new_v, 'c': new_c})
-            else:
-                table[key] = sample
-        
-        return new_samples
+    def collision_keys(self, block, step):
+        """Étape codée : clé = message du mot de code le plus proche de chaque bloc
+        
+        Deux blocs de même mot de code c (ou de mots opposés) ont pour somme ou
+        différence e1 ∓ e2, la différence de leurs erreurs de décodage : le bloc
+        n'est pas annulé mais réduit, avec q^k classes au lieu de q^b.
+        """
+        if not self.is_coded(step):
+            return super().collision_keys(block, step)
+        return self.code.messages(block), self.q
     
     def find_nearest_codeword(self, v_block):
-        """Trouve le mot de code le plus proche (code de répétition)"""
-        if not v_block:
-            return []
-        
-        # Valeur majoritaire
-        avg = sum(v_block) / len(v_block)
-        closest = min(range(self.q), key=lambda x: abs(x - avg))
-        
-        return [closest] * len(v_block)
\ No newline at end of file
+        """Mots de code les plus proches d'un lot de blocs (table de syndromes)"""
+        return self.code.decode(np.asarray(v_block, dtype=np.int64).reshape(-1, self.code.n))[0]
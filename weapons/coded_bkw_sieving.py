@@ -1,44 +1,67 @@
 from weapons.coded_bkw import CodedBKW
 import numpy as np
 
+# Lignes comparées à la fois lors de la recherche d'une combinaison
+SIEVE_CHUNK = 4096
+
 class CodedBKWSieving(CodedBKW):
     """CODED-BKW avec Sieving (tamisage)"""
     
+    # Le tamisage combine des lignes d'un même niveau : pas de cache de réduction
+    supports_reduction_cache = False
+    
     def __init__(self, params, log_callback=None):
         super().__init__(params, log_callback)
         self.B = 5  # Borne pour la norme
         self.log("🎯 Mode Sieving: contrôle de norme activé", 'info')
     
-    def coded_reduction_step(self, samples, step):
+    def reduction_step(self, V, c, step):
         """Réduction codée avec sieving"""
         # Étape CodeMap standard
-        reduced = super().coded_reduction_step(samples, step)
+        V, c = super().reduction_step(V, c, step)
+        if not self.is_coded(step):
+            return V, c
+        
+        # Différences signées : lignes en int64 (le niveau peut garder un type compact)
+        V = np.asarray(V, dtype=np.int64)
         
         # Sieving: combiner pour réduire norme
         self.log(f"🎯 Sieving: filtrage par norme (B={self.B})", 'info')
         
-        sieved = []
-        for i, s1 in enumerate(reduced):
-            norm1 = np.linalg.norm(s1['v'])
-            
-            if norm1 <= self.B * np.sqrt(len(s1['v'])):
-                sieved.append(s1)
+        bound = self.B * np.sqrt(V.shape[1])
+        norms = np.linalg.norm(V, axis=1)
+        
+        # Lignes retenues : (ligne, ligne combinée, coefficient) ; coefficient 0 = copie
+        left, right, coefficient = [], [], []
+        for i in range(len(c)):
+            if norms[i] <= bound:
+                left.append(i)
+                right.append(i)
+                coefficient.append(0)
                 continue
             
-            # Chercher combinaison qui réduit norme
-            found = False
-            for s2 in reduced[i+1:]:
-                new_v = [(s1['v'][j] - s2['v'][j]) % self.q 
-                        for j in range(len(s1['v']))]
-                new_norm = np.linalg.norm(new_v)
-                
-                if new_norm < norm1:
-                    new_c = (s1['c'] - s2['c']) % self.q
-                    sieved.append({'v': new_v, 'c': new_c})
-                    found = True
+            # Chercher combinaison qui réduit norme (première ligne suivante qui convient),
+            # par paquets pour borner le tableau temporaire
+            match = None
+            for lo in range(i + 1, len(c), SIEVE_CHUNK):
+                new_V = (V[i] - V[lo:lo + SIEVE_CHUNK]) % self.q
+                better = np.flatnonzero(np.linalg.norm(new_V, axis=1) < norms[i])
+                if len(better):
+                    match = lo + int(better[0])
                     break
             
-            if not found and norm1 < self.B * np.sqrt(len(s1['v'])) * 2:
-                sieved.append(s1)
+            if match is not None:
+                left.append(i)
+                right.append(match)
+                coefficient.append(1)
+            elif norms[i] < bound * 2:
+                left.append(i)
+                right.append(i)
+                coefficient.append(0)
         
-        return sieved
\ No newline at end of file
+        # Une seule indexation pour construire le niveau tamisé
+        left, right = np.array(left, dtype=np.int64), np.array(right, dtype=np.int64)
+        coefficient = np.array(coefficient, dtype=np.int64)
+        sieved_V = (V[left] - coefficient[:, None] * V[right]) % self.q
+        sieved_c = (c[left] - coefficient * c[right]) % self.q
+        return sieved_V, sieved_c
@@ -1,3 +1,4 @@
+import numpy as np
 from weapons.bkw_lwe import BKWLWE
 
 class LMSBKW(BKWLWE):
@@ -5,26 +6,17 @@ class LMSBKW(BKWLWE):
     
     def __init__(self, params, log_callback=None):
         super().__init__(params, log_callback)
-        self.p = self.q // 2  # Modulus réduit
+        self.p = params.get('lms_p', self.q // 2)  # Modulus réduit
         self.log(f"🔄 Réduction de modulus: q={self.q} → p={self.p}", 'info')
     
-    def reduction_phase(self, samples, block_current):
-        """Réduction avec conversion LMS"""
-        # Convertir vers Z_p
-        converted = []
-        for sample in samples:
-            v_p = [(v * self.p // self.q) % self.p for v in sample['v']]
-            c_p = (sample['c'] * self.p // self.q) % self.p
-            converted.append({'v': v_p, 'c': c_p, 'original': sample})
+    def collision_keys(self, block, step):
+        """Blocs ramenés dans Z_p : round(v·p/q) mod p, composante par composante
         
-        # Réduction standard dans Z_p
-        reduced = super().reduction_phase(converted, block_current)
-        
-        # Reconvertir vers Z_q
-        result = []
-        for sample in reduced:
-            v_q = [(v * self.q // self.p) % self.q for v in sample['v']]
-            c_q = (sample['c'] * self.q // self.p) % self.q
-            result.append({'v': v_q, 'c': c_q})
-        
-        return result
\ No newline at end of file
+        Deux lignes de même clé (ou de clés opposées) diffèrent d'au plus environ
+        q/(2p) par composante : la réduction laisse un petit résidu sur le bloc
+        au lieu de l'annuler. Les échantillons combinés restent ceux de Z_q (pas
+        d'aller-retour avec perte), donc les niveaux se conservent dans le cache
+        de réduction et ne changent qu'à la substitution arrière.
+        """
+        block = np.asarray(block, dtype=np.int64) % self.q
+        return (2 * self.p * block + self.q) // (2 * self.q) % self.p, self.p